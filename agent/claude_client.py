@@ -1,37 +1,215 @@
 """Claude Bedrock client for conversational AI."""
 
-import json
+import asyncio
+import gzip
+import threading
 import boto3
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 import pandas as pd
 import numpy as np
 from datetime import datetime, date
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Generator
 from utils.logger import setup_logger
 from utils.config import (
     AWS_ACCESS_KEY_ID,
     AWS_SECRET_ACCESS_KEY,
     AWS_REGION,
-    BEDROCK_MODEL_ID
+    BEDROCK_MODEL_ID,
+    BEDROCK_SUMMARY_MODEL_ID,
+    CHAT_HISTORY_MAX_TURNS,
+    CHAT_HISTORY_TOKEN_BUDGET
 )
 
 logger = setup_logger(__name__)
 
+# Prompt caching marker for the static request prefix (tools + system prompt)
+CACHE_CONTROL = {"type": "ephemeral"}
 
-class DateTimeEncoder(json.JSONEncoder):
-    """Custom JSON encoder for datetime and pandas objects."""
+# Prompt used to condense older conversation turns
+SUMMARY_PROMPT = """Summarize the following SLO analysis conversation for your own future reference.
+Keep service names, metric values, SLO targets, violations, degradations and conclusions.
+Be concise and use bullet points.
+
+CONVERSATION:
+{transcript}"""
+
+# Rough characters-per-token ratio used to estimate history size
+CHARS_PER_TOKEN = 4
+
+# Upper bound on tools executed concurrently within one Claude turn
+MAX_TOOL_WORKERS = 8
+
+# Request bodies at least this large are gzip-compressed before upload
+GZIP_MIN_BODY_BYTES = 64 * 1024
+
+# Shared Bedrock client so every ClaudeClient reuses the same warm connection pool
+_bedrock_client = None
+_bedrock_client_lock = threading.Lock()
+
+# Switched off if Bedrock ever rejects a gzip-encoded body
+_gzip_enabled = True
+
+
+def _should_gzip(body: Any) -> bool:
+    """Check whether a request body would be sent gzip-compressed.
+
+    Args:
+        body: Serialized request body
+
+    Returns:
+        True if the body is compressed before upload
+    """
+    return _gzip_enabled and isinstance(body, bytes) and len(body) >= GZIP_MIN_BODY_BYTES
+
+
+def _is_gzip_rejection(error: ClientError) -> bool:
+    """Check whether an error on a compressed request may be due to gzip.
+
+    An endpoint that ignores Content-Encoding sees the compressed bytes as
+    malformed JSON, so any 400 or 415 qualifies. Throttling and server
+    errors do not.
+
+    Args:
+        error: Error raised by the Bedrock call
+
+    Returns:
+        True for 400 and 415 responses
+    """
+    status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+    return status in (400, 415)
 
-    def default(self, obj):
-        if isinstance(obj, (pd.Timestamp, datetime, date)):
-            return obj.isoformat()
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if pd.isna(obj):
-            return None
-        return super().default(obj)
+
+def _call_with_gzip_fallback(operation: Callable[..., Any], **kwargs) -> Any:
+    """Call a Bedrock operation, retrying once uncompressed if gzip is rejected.
+
+    After a rejection compression stays off for the rest of the process.
+
+    Args:
+        operation: Bedrock client method (invoke_model, ...)
+        **kwargs: Operation arguments, including the serialized body
+
+    Returns:
+        The operation's response
+    """
+    global _gzip_enabled
+
+    try:
+        return operation(**kwargs)
+    except ClientError as e:
+        if not (_should_gzip(kwargs.get('body')) and _is_gzip_rejection(e)):
+            raise
+        logger.warning(f"Bedrock rejected a gzip-encoded request ({e}); sending uncompressed from now on")
+        _gzip_enabled = False
+        return operation(**kwargs)
+
+
+def _gzip_request_body(params: Dict[str, Any], **kwargs):
+    """botocore before-call hook that gzips large Bedrock request bodies.
+
+    Runs before the request is built and signed, so the signature covers the
+    compressed payload. before-sign would recompress on every retry, since
+    botocore rebuilds and re-signs the request per attempt.
+
+    Args:
+        params: botocore request dict (body, headers, ...)
+    """
+    if _should_gzip(params.get('body')):
+        params['body'] = gzip.compress(params['body'])
+        params['headers']['Content-Encoding'] = 'gzip'
+
+
+def _get_bedrock_client():
+    """Get the shared Bedrock runtime client, creating it on first use.
+
+    Returns:
+        boto3 bedrock-runtime client
+    """
+    global _bedrock_client
+
+    if _bedrock_client is None:
+        with _bedrock_client_lock:
+            if _bedrock_client is None:
+                from botocore.config import Config
+
+                # Configure with increased timeouts for long responses
+                config = Config(
+                    read_timeout=300,  # 5 minutes for reading response
+                    connect_timeout=10,  # 10 seconds for connection
+                    retries={'max_attempts': 2},
+                    tcp_keepalive=True,  # Keep TLS connections warm between calls
+                    max_pool_connections=50  # Allow concurrent chats without pool contention
+                )
+
+                _bedrock_client = boto3.client(
+                    service_name='bedrock-runtime',
+                    aws_access_key_id=AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                    region_name=AWS_REGION,
+                    config=config
+                )
+
+                # Conversation histories with tool results compress well
+                for operation in ('InvokeModel', 'InvokeModelWithResponseStream'):
+                    _bedrock_client.meta.events.register(
+                        f'before-call.bedrock-runtime.{operation}',
+                        _gzip_request_body
+                    )
+
+    return _bedrock_client
+
+
+def sanitize_for_json(obj: Any) -> Any:
+    """Convert tool results into plain Python types that orjson serializes natively.
+
+    DataFrames and arrays are converted in one vectorized step rather than
+    element by element; dicts and lists are walked recursively.
+
+    Args:
+        obj: Tool result (dict, list, DataFrame, numpy/pandas scalar, ...)
+
+    Returns:
+        Equivalent structure made only of dict, list, str, int, float, bool and None
+    """
+    # Exact type check: numpy.float64 subclasses float but orjson rejects it
+    if obj is None or type(obj) in (str, bool, int, float):
+        return obj
+    if isinstance(obj, dict):
+        # JSON object keys must be strings (e.g. hour buckets in hourly_patterns)
+        return {
+            key if type(key) is str else str(sanitize_for_json(key)): sanitize_for_json(value)
+            for key, value in obj.items()
+        }
+    if isinstance(obj, (list, tuple)):
+        return [sanitize_for_json(value) for value in obj]
+    if isinstance(obj, pd.DataFrame):
+        records = obj.astype(object).where(obj.notna(), None).to_dict('records')
+        return [sanitize_for_json(record) for record in records]
+    if isinstance(obj, pd.Series):
+        return sanitize_for_json(obj.astype(object).where(obj.notna(), None).tolist())
+    if isinstance(obj, np.ndarray):
+        values = obj.tolist()
+        return sanitize_for_json(values) if obj.dtype == object else values
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat() if pd.notna(obj) else None
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if pd.isna(obj):
+        return None
+    return obj
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize an object to a JSON string with orjson.
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        JSON string
+    """
+    return orjson.dumps(sanitize_for_json(obj)).decode()
 
 
 class ClaudeClient:
@@ -39,48 +217,33 @@ class ClaudeClient:
 
     def __init__(self):
         """Initialize Claude client."""
-        from botocore.config import Config
-
-        # Configure with increased timeouts for long responses
-        config = Config(
-            read_timeout=300,  # 5 minutes for reading response
-            connect_timeout=10,  # 10 seconds for connection
-            retries={'max_attempts': 2}
-        )
-
-        self.bedrock = boto3.client(
-            service_name='bedrock-runtime',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION,
-            config=config
-        )
+        self.bedrock = _get_bedrock_client()
         self.model_id = BEDROCK_MODEL_ID
+        self.summary_model_id = BEDROCK_SUMMARY_MODEL_ID
+        self.max_history_turns = CHAT_HISTORY_MAX_TURNS
+        self.history_token_budget = CHAT_HISTORY_TOKEN_BUDGET
         self.conversation_history = []
+        # id(message) -> (message, serialized bytes); history entries are never
+        # mutated after being appended, so each one is encoded only once
+        self._encoded_messages = {}
+        # (source tools list, tools with cache marker, encoded bytes); TOOLS is a
+        # module constant, so it is prepared and serialized once per client
+        self._encoded_tools = None
 
         logger.info(f"Claude client initialized with model {self.model_id}")
 
-    def send_message(self,
-                    user_message: str,
-                    tools: Optional[List[Dict[str, Any]]] = None,
-                    system_prompt: Optional[str] = None) -> Dict[str, Any]:
-        """Send a message to Claude and get response.
+    def _build_request_body(self,
+                            tools: Optional[List[Dict[str, Any]]] = None,
+                            system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """Build the Bedrock request body from the current conversation history.
 
         Args:
-            user_message: User's message
             tools: Optional list of tool definitions for function calling
             system_prompt: Optional system prompt
 
         Returns:
-            Claude's response
+            Request body dictionary
         """
-        # Add user message to history
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
-
-        # Prepare request
         request_body = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 8192,
@@ -88,31 +251,343 @@ class ClaudeClient:
             "temperature": 0.7
         }
 
-        if system_prompt:
-            request_body["system"] = system_prompt
+        # Mark the static tools + system prefix as cacheable so follow-up turns
+        # reuse Bedrock's prompt cache instead of re-processing it
+        if system_prompt:  # ✅ FIX: Preserve system prompt
+            request_body["system"] = [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": CACHE_CONTROL
+            }]
+
+        if tools:  # ✅ FIX: Preserve tools for multi-turn
+            if self._encoded_tools is None or self._encoded_tools[0] is not tools:
+                prepared_tools = tools[:-1] + [{**tools[-1], "cache_control": CACHE_CONTROL}]
+                self._encoded_tools = (tools, prepared_tools, orjson.dumps(prepared_tools))
+            request_body["tools"] = self._encoded_tools[1]
+
+        return request_body
+
+    def _estimate_tokens(self, message: Dict[str, Any]) -> int:
+        """Roughly estimate the number of tokens in a history message.
 
-        if tools:
-            request_body["tools"] = tools
+        Args:
+            message: Conversation message
+
+        Returns:
+            Estimated token count
+        """
+        cached = self._encoded_messages.get(id(message))
+        encoded = cached[1] if cached is not None else orjson.dumps(message)
+        return len(encoded) // CHARS_PER_TOKEN
+
+    @staticmethod
+    def _history_to_transcript(messages: List[Dict[str, Any]]) -> str:
+        """Flatten history messages into a plain-text transcript.
+
+        Args:
+            messages: Conversation messages
+
+        Returns:
+            Transcript text
+        """
+        lines = []
+        for message in messages:
+            role = "User" if message["role"] == "user" else "Assistant"
+            content = message["content"]
+
+            if isinstance(content, str):
+                lines.append(f"{role}: {content}")
+                continue
+
+            for block in content:
+                block_type = block.get("type")
+                if block_type == "text":
+                    lines.append(f"{role}: {block.get('text', '')}")
+                elif block_type == "tool_use":
+                    lines.append(f"Assistant called {block.get('name')} with {block.get('input', {})}")
+                elif block_type == "tool_result":
+                    lines.append(f"Tool result: {str(block.get('content', ''))[:2000]}")
+
+        return "\n".join(lines)
+
+    def _summarize(self, messages: List[Dict[str, Any]]) -> str:
+        """Summarize older conversation messages with the summary model.
+
+        Args:
+            messages: Conversation messages to condense
+
+        Returns:
+            Summary text (a truncated transcript if summarization fails)
+        """
+        transcript = self._history_to_transcript(messages)
+
+        request_body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 1024,
+            "messages": [{"role": "user", "content": SUMMARY_PROMPT.format(transcript=transcript)}],
+            "temperature": 0
+        }
 
         try:
-            # Call Bedrock API
-            response = self.bedrock.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
+            response = _call_with_gzip_fallback(
+                self.bedrock.invoke_model,
+                modelId=self.summary_model_id,
+                body=orjson.dumps(request_body)
+            )
+            response_body = orjson.loads(response['body'].read())
+            summary = "".join(
+                block.get("text", "") for block in response_body.get("content", [])
+                if block.get("type") == "text"
             )
+            if summary:
+                return summary
+            logger.warning("Empty summary returned, keeping truncated transcript instead")
+        except Exception as e:
+            logger.warning(f"Failed to summarize conversation history: {e}")
 
-            # Parse response
-            response_body = json.loads(response['body'].read())
+        # Fall back to the tail of the transcript, capped at a quarter of the budget
+        max_chars = self.history_token_budget * CHARS_PER_TOKEN // 4
+        return transcript[-max_chars:]
 
-            # Add assistant response to history (with validation)
-            content = response_body.get("content", [])
-            if content:  # ✅ FIX: Only add if content is not empty
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": content
-                })
+    def _compact_history(self, max_history_turns: Optional[int] = None):
+        """Keep conversation history within the turn and token budgets.
+
+        Older turns are replaced by a single summary exchange. History is only
+        cut at the start of a user turn, so tool_use / tool_result pairs always
+        stay together.
+
+        Args:
+            max_history_turns: Turns to keep verbatim (default: self.max_history_turns)
+        """
+        if max_history_turns is None:
+            max_history_turns = self.max_history_turns
+        history = self.conversation_history
+        turn_starts = [
+            index for index, message in enumerate(history)
+            if message["role"] == "user" and isinstance(message["content"], str)
+        ]
+        token_counts = [self._estimate_tokens(message) for message in history]
+
+        if len(turn_starts) <= max_history_turns and sum(token_counts) <= self.history_token_budget:
+            return
+
+        # Keep the most recent turns that fit both budgets (always at least one)
+        cut = turn_starts[-1]
+        kept_tokens = sum(token_counts[cut:])
+        kept_turns = 1
+        for start in reversed(turn_starts[:-1]):
+            turn_tokens = sum(token_counts[start:cut])
+            if kept_turns + 1 > max_history_turns or kept_tokens + turn_tokens > self.history_token_budget:
+                break
+            cut = start
+            kept_tokens += turn_tokens
+            kept_turns += 1
+
+        if cut == 0:
+            return
+
+        # The summary is sent as a content block rather than a plain string, so
+        # it is not counted as a user turn against max_history_turns
+        summary = self._summarize(history[:cut])
+        self.conversation_history = [
+            {"role": "user", "content": [{"type": "text", "text": f"Prior context summary:\n{summary}"}]},
+            {"role": "assistant", "content": [{"type": "text", "text": "Understood. I will use this context for the rest of the conversation."}]}
+        ] + history[cut:]
+
+        logger.info(f"Summarized {cut} older messages; kept {len(history) - cut} recent messages")
+
+    def _encode_request_body(self, request_body: Dict[str, Any]) -> bytes:
+        """Serialize a request body, reusing the encoded form of earlier messages.
+
+        Tool results are already JSON strings, so re-encoding the whole history
+        on every turn would escape each of them again. Instead every message is
+        encoded once and the ``messages`` array is spliced into the envelope,
+        together with the pre-encoded tool definitions.
+
+        Args:
+            request_body: Bedrock request body
+
+        Returns:
+            JSON-encoded request body
+        """
+        envelope = {key: value for key, value in request_body.items() if key not in ("messages", "tools")}
+
+        encoded_messages = {}
+        parts = []
+        for message in request_body.get("messages", []):
+            cached = self._encoded_messages.get(id(message))
+            encoded = cached[1] if cached is not None else orjson.dumps(message)
+            encoded_messages[id(message)] = (message, encoded)
+            parts.append(encoded)
+        self._encoded_messages = encoded_messages
+
+        body = orjson.dumps(envelope)[:-1]
+
+        tools = request_body.get("tools")
+        if tools is not None:
+            if self._encoded_tools is not None and self._encoded_tools[1] is tools:
+                encoded_tools = self._encoded_tools[2]
             else:
-                logger.warning("Received empty content from Claude, not adding to history")
+                encoded_tools = orjson.dumps(tools)
+            body += b',"tools":' + encoded_tools
+
+        return body + b',"messages":[' + b",".join(parts) + b"]}"
+
+    def _invoke_stream(self, request_body: Dict[str, Any]) -> Generator[str, None, Dict[str, Any]]:
+        """Invoke Claude with response streaming.
+
+        Yields text deltas as soon as they arrive and accumulates the streamed
+        events into the same shape as a non-streaming ``invoke_model`` response,
+        so callers can keep working with ``content`` / ``stop_reason``.
+
+        Args:
+            request_body: Bedrock request body
+
+        Yields:
+            Text deltas from Claude's response
+
+        Returns:
+            Response body with ``content`` blocks and ``stop_reason``
+        """
+        response = _call_with_gzip_fallback(
+            self.bedrock.invoke_model_with_response_stream,
+            modelId=self.model_id,
+            body=self._encode_request_body(request_body)
+        )
+
+        response_body = {"content": [], "stop_reason": None}
+        blocks = {}
+        # Deltas are collected per block and joined once, avoiding repeated
+        # string concatenation on long responses
+        text_parts = {}
+        partial_inputs = {}
+
+        for event in response['body']:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+
+            data = orjson.loads(chunk['bytes'])
+            event_type = data.get('type')
+
+            if event_type == 'message_start':
+                message = data.get('message', {})
+                for key in ('id', 'model', 'role', 'usage'):
+                    if key in message:
+                        response_body[key] = message[key]
+
+            elif event_type == 'content_block_start':
+                index = data.get('index', len(blocks))
+                blocks[index] = dict(data.get('content_block', {}))
+                if blocks[index].get('type') == 'tool_use':
+                    partial_inputs[index] = []
+                else:
+                    text_parts[index] = [blocks[index].get('text', "")]
+
+            elif event_type == 'content_block_delta':
+                index = data.get('index')
+                delta = data.get('delta', {})
+                delta_type = delta.get('type')
+
+                if delta_type == 'text_delta':
+                    text = delta.get('text', "")
+                    blocks.setdefault(index, {"type": "text"})
+                    text_parts.setdefault(index, []).append(text)
+                    if text:
+                        yield text
+                elif delta_type == 'input_json_delta':
+                    partial_inputs.setdefault(index, []).append(delta.get('partial_json', ""))
+
+            elif event_type == 'content_block_stop':
+                index = data.get('index')
+                if index in partial_inputs:
+                    partial_json = "".join(partial_inputs.pop(index))
+                    blocks[index]['input'] = orjson.loads(partial_json) if partial_json else {}
+
+            elif event_type == 'message_delta':
+                delta = data.get('delta', {})
+                if 'stop_reason' in delta:
+                    response_body['stop_reason'] = delta['stop_reason']
+                if 'usage' in data:
+                    response_body.setdefault('usage', {}).update(data['usage'])
+
+        for index, parts in text_parts.items():
+            blocks[index]['text'] = "".join(parts)
+
+        response_body['content'] = [blocks[index] for index in sorted(blocks)]
+        return response_body
+
+    def _append_assistant_turn(self, response_body: Dict[str, Any]):
+        """Record Claude's reply in the conversation history.
+
+        The streamed ``content`` list is stored by reference; it is built fresh
+        for every response, so no copy is needed.
+
+        Args:
+            response_body: Response returned by ``_invoke_stream``
+        """
+        content = response_body.get("content", [])
+        if content:  # ✅ FIX: Only add if content is not empty
+            self.conversation_history.append({
+                "role": "assistant",
+                "content": content
+            })
+        else:
+            logger.warning("Received empty content from Claude, not adding to history")
+
+    @staticmethod
+    def _drain(stream: Generator[str, None, Any]) -> Any:
+        """Consume a streaming generator and return its final value.
+
+        Args:
+            stream: Generator yielding text deltas
+
+        Returns:
+            The generator's return value
+        """
+        while True:
+            try:
+                next(stream)
+            except StopIteration as stop:
+                return stop.value
+
+    def send_message_stream(self,
+                            user_message: str,
+                            tools: Optional[List[Dict[str, Any]]] = None,
+                            system_prompt: Optional[str] = None,
+                            max_history_turns: Optional[int] = None) -> Generator[str, None, Dict[str, Any]]:
+        """Send a message to Claude and stream the response.
+
+        Args:
+            user_message: User's message
+            tools: Optional list of tool definitions for function calling
+            system_prompt: Optional system prompt
+            max_history_turns: Turns to keep verbatim (default: self.max_history_turns)
+
+        Yields:
+            Text deltas from Claude's response
+
+        Returns:
+            Claude's response
+        """
+        # Bound history before starting a new turn
+        self._compact_history(max_history_turns)
+
+        # Add user message to history
+        self.conversation_history.append({
+            "role": "user",
+            "content": user_message
+        })
+
+        request_body = self._build_request_body(tools, system_prompt)
+
+        try:
+            # Call Bedrock API
+            response_body = yield from self._invoke_stream(request_body)
+
+            # Add assistant response to history (with validation)
+            self._append_assistant_turn(response_body)
 
             logger.info(f"Claude response received (stop_reason: {response_body.get('stop_reason')})")
 
@@ -122,12 +597,64 @@ class ClaudeClient:
             logger.error(f"Failed to call Claude API: {e}")
             raise
 
-    def handle_tool_use(self,
-                       response: Dict[str, Any],
-                       tool_executor: Any,
-                       tools: Optional[List[Dict[str, Any]]] = None,
-                       system_prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Handle tool use from Claude's response.
+    def send_message(self,
+                    user_message: str,
+                    tools: Optional[List[Dict[str, Any]]] = None,
+                    system_prompt: Optional[str] = None,
+                    max_history_turns: Optional[int] = None) -> Dict[str, Any]:
+        """Send a message to Claude and get response.
+
+        Args:
+            user_message: User's message
+            tools: Optional list of tool definitions for function calling
+            system_prompt: Optional system prompt
+            max_history_turns: Turns to keep verbatim (default: self.max_history_turns)
+
+        Returns:
+            Claude's response
+        """
+        return self._drain(self.send_message_stream(user_message, tools, system_prompt, max_history_turns))
+
+    @staticmethod
+    def _execute_tool(tool_executor: Any, tool_use: Dict[str, Any]) -> str:
+        """Execute a single tool call and serialize its result.
+
+        Args:
+            tool_executor: Function executor instance
+            tool_use: tool_use content block from Claude
+
+        Returns:
+            JSON-encoded tool result (or error) for the tool_result block
+        """
+        tool_name = tool_use.get("name")
+        tool_input = tool_use.get("input", {})
+
+        logger.info(f"Executing tool: {tool_name} with input: {tool_input}")
+
+        try:
+            # Execute the tool
+            result = tool_executor.execute(tool_name, tool_input)
+
+            # Serialize result with validation
+            result_json = _dumps(result)
+
+            # ✅ FIX: Validate result is not empty
+            if not result_json or result_json == "null" or result_json == "{}":
+                result_json = _dumps({"message": "No data found"})
+
+            logger.info(f"Tool {tool_name} executed successfully")
+            return result_json
+
+        except Exception as e:
+            logger.error(f"Tool execution failed: {e}", exc_info=True)
+            return _dumps({"error": str(e)})
+
+    def handle_tool_use_stream(self,
+                               response: Dict[str, Any],
+                               tool_executor: Any,
+                               tools: Optional[List[Dict[str, Any]]] = None,
+                               system_prompt: Optional[str] = None) -> Generator[str, None, Optional[Dict[str, Any]]]:
+        """Handle tool use from Claude's response and stream the follow-up.
 
         Args:
             response: Claude's response containing tool use
@@ -135,52 +662,55 @@ class ClaudeClient:
             tools: Optional tool definitions (needed for multi-turn)
             system_prompt: Optional system prompt (needed for multi-turn)
 
+        Yields:
+            Text deltas from Claude's follow-up response
+
         Returns:
             Final response after tool execution, or None if no tool use
         """
         content = response.get("content", [])
 
         # Check if response contains tool use
-        tool_uses = [block for block in content if block.get("type") == "tool_use"]
+        tool_uses = []
+        for block in content:
+            if block.get("type") == "tool_use":
+                tool_uses.append(block)
 
         if not tool_uses:
             return None
 
-        # Execute each tool
-        tool_results = []
-        for tool_use in tool_uses:
-            tool_name = tool_use.get("name")
-            tool_input = tool_use.get("input", {})
-            tool_use_id = tool_use.get("id")
-
-            logger.info(f"Executing tool: {tool_name} with input: {tool_input}")
-
-            try:
-                # Execute the tool
-                result = tool_executor.execute(tool_name, tool_input)
-
-                # Serialize result with validation
-                result_json = json.dumps(result, cls=DateTimeEncoder)
-
-                # ✅ FIX: Validate result is not empty
-                if not result_json or result_json == "null" or result_json == "{}":
-                    result_json = json.dumps({"message": "No data found"})
-
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": tool_use_id,
-                    "content": result_json
-                })
-
-                logger.info(f"Tool {tool_name} executed successfully")
-
-            except Exception as e:
-                logger.error(f"Tool execution failed: {e}", exc_info=True)
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": tool_use_id,
-                    "content": json.dumps({"error": str(e)})
-                })
+        # Identical (name, input) calls in one turn are executed only once
+        call_keys = [
+            (tool_use.get("name"), orjson.dumps(tool_use.get("input", {}), option=orjson.OPT_SORT_KEYS))
+            for tool_use in tool_uses
+        ]
+        unique_calls = {}
+        for key, tool_use in zip(call_keys, tool_uses):
+            unique_calls.setdefault(key, tool_use)
+        if len(unique_calls) < len(tool_uses):
+            logger.info(f"Skipping {len(tool_uses) - len(unique_calls)} duplicate tool call(s)")
+
+        # Execute tools concurrently - they are independent analytics reads,
+        # so wall time is the slowest tool rather than the sum of all of them
+        if len(unique_calls) == 1:
+            results = [self._execute_tool(tool_executor, tool_use) for tool_use in unique_calls.values()]
+        else:
+            with ThreadPoolExecutor(max_workers=min(MAX_TOOL_WORKERS, len(unique_calls))) as pool:
+                results = list(pool.map(
+                    lambda tool_use: self._execute_tool(tool_executor, tool_use),
+                    unique_calls.values()
+                ))
+        result_by_key = dict(zip(unique_calls, results))
+
+        # One tool_result per tool_use_id, in the order Claude requested them
+        tool_results = [
+            {
+                "type": "tool_result",
+                "tool_use_id": tool_use.get("id"),
+                "content": result_by_key[key]
+            }
+            for key, tool_use in zip(call_keys, tool_uses)
+        ]
 
         # Send tool results back to Claude
         self.conversation_history.append({
@@ -189,36 +719,13 @@ class ClaudeClient:
         })
 
         # ✅ FIX: Include system_prompt and tools in follow-up request
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 8192,
-            "messages": self.conversation_history,
-            "temperature": 0.7
-        }
-
-        if system_prompt:  # ✅ FIX: Preserve system prompt
-            request_body["system"] = system_prompt
-
-        if tools:  # ✅ FIX: Preserve tools for multi-turn
-            request_body["tools"] = tools
+        request_body = self._build_request_body(tools, system_prompt)
 
         try:
-            response = self.bedrock.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
-            )
-
-            response_body = json.loads(response['body'].read())
+            response_body = yield from self._invoke_stream(request_body)
 
             # Add to history (with validation)
-            content = response_body.get("content", [])
-            if content:  # ✅ FIX: Only add if content is not empty
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": content
-                })
-            else:
-                logger.warning("Received empty content after tool use, not adding to history")
+            self._append_assistant_turn(response_body)
 
             return response_body
 
@@ -226,13 +733,32 @@ class ClaudeClient:
             logger.error(f"Failed to get final response: {e}")
             raise
 
-    def chat(self,
-            user_message: str,
-            tools: Optional[List[Dict[str, Any]]] = None,
-            tool_executor: Optional[Any] = None,
-            system_prompt: Optional[str] = None,
-            max_tool_iterations: int = 5) -> str:
-        """Complete chat interaction with tool support.
+    def handle_tool_use(self,
+                       response: Dict[str, Any],
+                       tool_executor: Any,
+                       tools: Optional[List[Dict[str, Any]]] = None,
+                       system_prompt: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Handle tool use from Claude's response.
+
+        Args:
+            response: Claude's response containing tool use
+            tool_executor: Function executor instance
+            tools: Optional tool definitions (needed for multi-turn)
+            system_prompt: Optional system prompt (needed for multi-turn)
+
+        Returns:
+            Final response after tool execution, or None if no tool use
+        """
+        return self._drain(self.handle_tool_use_stream(response, tool_executor, tools, system_prompt))
+
+    def chat_stream(self,
+                    user_message: str,
+                    tools: Optional[List[Dict[str, Any]]] = None,
+                    tool_executor: Optional[Any] = None,
+                    system_prompt: Optional[str] = None,
+                    max_tool_iterations: int = 5,
+                    max_history_turns: Optional[int] = None) -> Generator[str, None, None]:
+        """Complete chat interaction with tool support, streaming text as it arrives.
 
         Args:
             user_message: User's message
@@ -240,12 +766,24 @@ class ClaudeClient:
             tool_executor: Optional tool executor
             system_prompt: Optional system prompt
             max_tool_iterations: Maximum number of tool call iterations (default: 5)
+            max_history_turns: Turns to keep verbatim (default: self.max_history_turns)
 
-        Returns:
-            Final text response from Claude
+        Yields:
+            Text deltas from Claude across all tool-use rounds, with a blank
+            line between the text of separate rounds
         """
+        text_emitted = False
+
         # Get initial response
-        response = self.send_message(user_message, tools, system_prompt)
+        stream = self.send_message_stream(user_message, tools, system_prompt, max_history_turns)
+        while True:
+            try:
+                text = next(stream)
+            except StopIteration as stop:
+                response = stop.value
+                break
+            yield text
+            text_emitted = True
 
         # ✅ FIX: Handle multiple rounds of tool calls
         iterations = 0
@@ -253,7 +791,18 @@ class ClaudeClient:
             logger.info(f"Tool use iteration {iterations + 1}/{max_tool_iterations}")
 
             # Pass tools and system_prompt to maintain context
-            response = self.handle_tool_use(response, tool_executor, tools, system_prompt)
+            stream = self.handle_tool_use_stream(response, tool_executor, tools, system_prompt)
+            # Separate this round's text from text of earlier rounds
+            separator = "\n\n" if text_emitted else ""
+            while True:
+                try:
+                    text = next(stream)
+                except StopIteration as stop:
+                    response = stop.value
+                    break
+                yield separator + text
+                separator = ""
+                text_emitted = True
 
             if not response:
                 logger.error("Tool use handler returned None")
@@ -265,20 +814,73 @@ class ClaudeClient:
         if iterations >= max_tool_iterations:
             logger.warning(f"Reached max tool iterations ({max_tool_iterations})")
 
-        # Extract text response
-        text_response = ""
-        content = response.get("content", [])
-
-        for block in content:
-            if block.get("type") == "text":
-                text_response += block.get("text", "")
-
         # ✅ FIX: Return helpful message if no text was generated
-        if not text_response:
+        if not text_emitted:
             logger.warning("No text response generated by Claude")
-            text_response = "I was unable to generate a response. Please try rephrasing your question."
+            yield "I was unable to generate a response. Please try rephrasing your question."
+
+    def chat(self,
+            user_message: str,
+            tools: Optional[List[Dict[str, Any]]] = None,
+            tool_executor: Optional[Any] = None,
+            system_prompt: Optional[str] = None,
+            max_tool_iterations: int = 5,
+            max_history_turns: Optional[int] = None) -> str:
+        """Complete chat interaction with tool support.
+
+        Args:
+            user_message: User's message
+            tools: Optional tool definitions
+            tool_executor: Optional tool executor
+            system_prompt: Optional system prompt
+            max_tool_iterations: Maximum number of tool call iterations (default: 5)
+            max_history_turns: Turns to keep verbatim (default: self.max_history_turns)
 
-        return text_response
+        Returns:
+            Final text response from Claude
+        """
+        return "".join(self.chat_stream(
+            user_message,
+            tools=tools,
+            tool_executor=tool_executor,
+            system_prompt=system_prompt,
+            max_tool_iterations=max_tool_iterations,
+            max_history_turns=max_history_turns
+        ))
+
+    async def chat_async(self,
+                         user_message: str,
+                         tools: Optional[List[Dict[str, Any]]] = None,
+                         tool_executor: Optional[Any] = None,
+                         system_prompt: Optional[str] = None,
+                         max_tool_iterations: int = 5,
+                         max_history_turns: Optional[int] = None) -> str:
+        """Awaitable variant of chat() for asyncio servers.
+
+        The blocking Bedrock call runs in a worker thread, so an event loop can
+        serve many conversations (one ClaudeClient each) concurrently; they all
+        share the pooled Bedrock client.
+
+        Args:
+            user_message: User's message
+            tools: Optional tool definitions
+            tool_executor: Optional tool executor
+            system_prompt: Optional system prompt
+            max_tool_iterations: Maximum number of tool call iterations (default: 5)
+            max_history_turns: Turns to keep verbatim (default: self.max_history_turns)
+
+        Returns:
+            Final text response from Claude
+        """
+        return await asyncio.to_thread(
+            self.chat,
+            user_message,
+            tools=tools,
+            tool_executor=tool_executor,
+            system_prompt=system_prompt,
+            max_tool_iterations=max_tool_iterations,
+            max_history_turns=max_history_turns
+        )
 
     def clear_history(self):
         """Clear conversation history."""
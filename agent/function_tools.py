@@ -1,7 +1,9 @@
 """Function tools for Claude to analyze SLO data."""
 
 import json
-from typing import Dict, List, Any
+import threading
+from typing import Dict, List, Any, Hashable
+from cachetools import TTLCache
 from analytics.slo_calculator import SLOCalculator
 from analytics.degradation_detector import DegradationDetector
 from analytics.trend_analyzer import TrendAnalyzer
@@ -10,6 +12,29 @@ from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Tool results are reused for this long across consecutive Claude turns
+RESULT_CACHE_TTL_SECONDS = 30
+RESULT_CACHE_MAX_SIZE = 256
+
+# Predictions are always recomputed
+UNCACHED_FUNCTION_PREFIXES = ("predict_",)
+
+
+def _hashable(value: Any) -> Hashable:
+    """Convert a tool parameter value into a hashable cache key component.
+
+    Args:
+        value: Parameter value (scalar, list or dict)
+
+    Returns:
+        Hashable representation of the value
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_hashable(v) for v in value)
+    return value
+
 
 class FunctionExecutor:
     """Executor for analytics functions called by Claude."""
@@ -32,17 +57,8 @@ class FunctionExecutor:
         self.trend_analyzer = trend_analyzer
         self.metrics_aggregator = metrics_aggregator
 
-    def execute(self, function_name: str, parameters: Dict[str, Any]) -> Any:
-        """Execute a function by name.
-
-        Args:
-            function_name: Name of the function to execute
-            parameters: Function parameters
-
-        Returns:
-            Function result
-        """
-        function_map = {
+        # Dispatch table built once; bound methods are reused on every call
+        self._function_map = {
             "get_degrading_services": self._get_degrading_services,
             "get_error_code_distribution": self._get_error_code_distribution,
             "get_current_sli": self._get_current_sli,
@@ -60,10 +76,47 @@ class FunctionExecutor:
             "get_historical_patterns": self._get_historical_patterns
         }
 
-        if function_name not in function_map:
+        self._cache = TTLCache(maxsize=RESULT_CACHE_MAX_SIZE, ttl=RESULT_CACHE_TTL_SECONDS)
+        self._cache_lock = threading.Lock()
+
+    def clear_cache(self):
+        """Drop all memoized tool results (call after reloading data)."""
+        with self._cache_lock:
+            self._cache.clear()
+        logger.info("Function result cache cleared")
+
+    def execute(self, function_name: str, parameters: Dict[str, Any]) -> Any:
+        """Execute a function by name.
+
+        Args:
+            function_name: Name of the function to execute
+            parameters: Function parameters
+
+        Returns:
+            Function result
+        """
+        function = self._function_map.get(function_name)
+        if function is None:
             return {"error": f"Unknown function: {function_name}"}
 
-        return function_map[function_name](**parameters)
+        if function_name.startswith(UNCACHED_FUNCTION_PREFIXES):
+            return function(**parameters)
+
+        # Keyed on the database's data version, so results from before any
+        # load are never served afterwards
+        data_version = self.slo_calculator.db_manager.data_version
+        key = (function_name, _hashable(parameters), data_version)
+        with self._cache_lock:
+            if key in self._cache:
+                logger.info(f"Cache hit for {function_name}")
+                return self._cache[key]
+
+        result = function(**parameters)
+
+        with self._cache_lock:
+            self._cache[key] = result
+
+        return result
 
     def _get_degrading_services(self, time_window_minutes: int = 30) -> Dict[str, Any]:
         """Get services degrading over time window."""
@@ -79,7 +132,11 @@ class FunctionExecutor:
     def _get_current_sli(self, service_name: str = None) -> Dict[str, Any]:
         """Get current SLI for services."""
         df = self.slo_calculator.get_current_sli(service_name)
-        return {"services": df.to_dict('records'), "count": len(df)}
+        # Columnar shape: column names are sent once instead of once per row
+        return {
+            "services": {"columns": list(df.columns), "data": df.values.tolist()},
+            "count": len(df)
+        }
 
     def _predict_issues_today(self) -> Dict[str, Any]:
         """Predict services with potential issues."""
@@ -173,7 +230,7 @@ TOOLS = [
     },
     {
         "name": "get_current_sli",
-        "description": "Get current Service Level Indicators (SLI) including success rate, error rate, and response time for all services or a specific service.",
+        "description": "Get current Service Level Indicators (SLI) including success rate, error rate, and response time for all services or a specific service. Results are columnar: 'services.columns' lists the field names and each row in 'services.data' holds the values in that order.",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -235,7 +292,7 @@ TOOLS = [
     },
     {
         "name": "get_volume_trends",
-        "description": "Get request volume trends and error patterns over time for a service.",
+        "description": "Get request volume trends and error patterns over time for a service. Long windows are returned as up to 100 evenly sized time bins.",
         "input_schema": {
             "type": "object",
             "properties": {
@@ -1,11 +1,11 @@
 """Degradation detector for identifying services with declining performance."""
 
-import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from data.database.duckdb_manager import DuckDBManager
+from analytics.metrics import volume_weighted_sql
 from utils.logger import setup_logger
-from utils.config import DEGRADATION_WINDOW_MINUTES, DEGRADATION_THRESHOLD_PERCENT
+from utils.config import DEGRADATION_WINDOW_MINUTES, DEGRADATION_THRESHOLD_PERCENT, VOLUME_TREND_MAX_POINTS
 
 logger = setup_logger(__name__)
 
@@ -47,112 +47,85 @@ class DegradationDetector:
         baseline_end = window_start
         baseline_start = baseline_end - timedelta(minutes=time_window_minutes)
 
-        # Get metrics for recent window
-        recent_sql = f"""
-            SELECT
-                service_name,
-                AVG(error_rate) as avg_error_rate,
-                AVG(response_time_avg) as avg_response_time,
-                AVG(response_time_p95) as avg_response_time_p95,
-                AVG(response_time_p99) as avg_response_time_p99,
-                SUM(total_count) as total_requests,
-                SUM(error_count) as total_errors
-            FROM service_logs
-            WHERE record_time >= '{window_start}' AND record_time <= '{current_time}'
-            GROUP BY service_name
-        """
-        recent_df = self.db_manager.query(recent_sql)
-
-        # Get metrics for baseline window
-        baseline_sql = f"""
+        # Aggregate both windows in one scan, then compare and classify in
+        # the same query
+        sql = f"""
+            WITH windowed AS (
+                SELECT
+                    *,
+                    record_time >= $window_start as is_recent
+                FROM service_logs
+                WHERE record_time >= $baseline_start AND record_time <= $current_time
+            ),
+            windows AS (
+                SELECT
+                    service_name,
+                    {self._window_columns_sql('recent', 'is_recent')},
+                    {self._window_columns_sql('baseline', 'NOT is_recent')}
+                FROM windowed
+                GROUP BY service_name
+            ),
+            changes AS (
+                SELECT
+                    service_name,
+                    recent_error_rate as error_rate_recent,
+                    baseline_error_rate as error_rate_baseline,
+                    {self._percent_change_sql('baseline_error_rate', 'recent_error_rate')} as error_rate_change_percent,
+                    recent_response_time as response_time_recent,
+                    baseline_response_time as response_time_baseline,
+                    {self._percent_change_sql('baseline_response_time', 'recent_response_time')} as response_time_change_percent,
+                    recent_response_time_p95 as response_time_p95_recent,
+                    baseline_response_time_p95 as response_time_p95_baseline,
+                    COALESCE({self._percent_change_sql('baseline_response_time_p95', 'recent_response_time_p95')}, 0.0) as response_time_p95_change_percent,
+                    recent_response_time_p99 as response_time_p99_recent,
+                    baseline_response_time_p99 as response_time_p99_baseline,
+                    COALESCE({self._percent_change_sql('baseline_response_time_p99', 'recent_response_time_p99')}, 0.0) as response_time_p99_change_percent,
+                    COALESCE(recent_total_requests, 0)::BIGINT as total_requests_recent,
+                    COALESCE(recent_total_errors, 0)::BIGINT as total_errors_recent
+                FROM windows
+                -- Only services with data in both windows can be compared
+                WHERE recent_rows > 0 AND baseline_rows > 0
+            ),
+            degrading AS (
+                -- Drop healthy services before scoring; each OR branch is
+                -- only evaluated for rows the earlier branches rejected
+                SELECT *
+                FROM changes
+                WHERE error_rate_change_percent > $threshold
+                    OR response_time_change_percent > $threshold
+                    OR response_time_p95_change_percent > $threshold
+                    OR response_time_p99_change_percent > $threshold
+            ),
+            scored AS (
+                SELECT
+                    *,
+                    GREATEST(
+                        error_rate_change_percent,
+                        response_time_change_percent,
+                        response_time_p95_change_percent,
+                        response_time_p99_change_percent
+                    ) as max_change
+                FROM degrading
+            )
             SELECT
-                service_name,
-                AVG(error_rate) as avg_error_rate,
-                AVG(response_time_avg) as avg_response_time,
-                AVG(response_time_p95) as avg_response_time_p95,
-                AVG(response_time_p99) as avg_response_time_p99,
-                SUM(total_count) as total_requests,
-                SUM(error_count) as total_errors
-            FROM service_logs
-            WHERE record_time >= '{baseline_start}' AND record_time < '{baseline_end}'
-            GROUP BY service_name
+                * EXCLUDE (max_change),
+                CASE
+                    WHEN max_change > 100 THEN 'critical'
+                    WHEN max_change > 50 THEN 'warning'
+                    ELSE 'minor'
+                END as severity
+            FROM scored
+            ORDER BY max_change DESC
         """
-        baseline_df = self.db_manager.query(baseline_sql)
-
-        # Merge and compare
-        comparison = recent_df.merge(
-            baseline_df,
-            on='service_name',
-            suffixes=('_recent', '_baseline'),
-            how='inner'
-        )
+        df = self.db_manager.query(sql, {
+            'window_start': window_start,
+            'current_time': current_time,
+            'baseline_start': baseline_start,
+            'threshold': threshold_percent
+        })
 
-        degrading_services = []
-
-        for _, row in comparison.iterrows():
-            # Calculate percentage changes
-            error_rate_change = self._calculate_percent_change(
-                row['avg_error_rate_baseline'],
-                row['avg_error_rate_recent']
-            )
-
-            response_time_change = self._calculate_percent_change(
-                row['avg_response_time_baseline'],
-                row['avg_response_time_recent']
-            )
-
-            # Calculate P95/P99 changes (if available)
-            p95_change = self._calculate_percent_change(
-                row['avg_response_time_p95_baseline'],
-                row['avg_response_time_p95_recent']
-            ) if pd.notna(row['avg_response_time_p95_recent']) and pd.notna(row['avg_response_time_p95_baseline']) else 0.0
-
-            p99_change = self._calculate_percent_change(
-                row['avg_response_time_p99_baseline'],
-                row['avg_response_time_p99_recent']
-            ) if pd.notna(row['avg_response_time_p99_recent']) and pd.notna(row['avg_response_time_p99_baseline']) else 0.0
-
-            # Check if degrading (include P95/P99 in degradation check)
-            is_degrading = (
-                error_rate_change > threshold_percent or
-                response_time_change > threshold_percent or
-                p95_change > threshold_percent or
-                p99_change > threshold_percent
-            )
-
-            if is_degrading:
-                # Handle NaN values safely
-                total_req = row['total_requests_recent']
-                total_err = row['total_errors_recent']
-                degrading_services.append({
-                    'service_name': row['service_name'],
-                    'error_rate_recent': row['avg_error_rate_recent'],
-                    'error_rate_baseline': row['avg_error_rate_baseline'],
-                    'error_rate_change_percent': error_rate_change,
-                    'response_time_recent': row['avg_response_time_recent'],
-                    'response_time_baseline': row['avg_response_time_baseline'],
-                    'response_time_change_percent': response_time_change,
-                    'response_time_p95_recent': row['avg_response_time_p95_recent'] if pd.notna(row['avg_response_time_p95_recent']) else None,
-                    'response_time_p95_baseline': row['avg_response_time_p95_baseline'] if pd.notna(row['avg_response_time_p95_baseline']) else None,
-                    'response_time_p95_change_percent': p95_change,
-                    'response_time_p99_recent': row['avg_response_time_p99_recent'] if pd.notna(row['avg_response_time_p99_recent']) else None,
-                    'response_time_p99_baseline': row['avg_response_time_p99_baseline'] if pd.notna(row['avg_response_time_p99_baseline']) else None,
-                    'response_time_p99_change_percent': p99_change,
-                    'total_requests_recent': int(total_req) if pd.notna(total_req) else 0,
-                    'total_errors_recent': int(total_err) if pd.notna(total_err) else 0,
-                    'severity': self._classify_severity(error_rate_change, response_time_change, p95_change, p99_change)
-                })
-
-        # Sort by severity (highest change first, prioritizing P99)
-        degrading_services.sort(
-            key=lambda x: max(
-                x['error_rate_change_percent'],
-                x['response_time_change_percent'],
-                x.get('response_time_p95_change_percent', 0),
-                x.get('response_time_p99_change_percent', 0)
-            ),
-            reverse=True
-        )
+        # Sorted by severity in SQL (highest change first); NULLs become None
+        degrading_services = df.astype(object).where(df.notna(), None).to_dict('records')
 
         logger.info(f"Found {len(degrading_services)} degrading services")
         return degrading_services
@@ -179,23 +152,17 @@ class DegradationDetector:
 
         # Build query
         where_clauses = [
-            f"record_time >= '{window_start}'",
-            f"record_time <= '{current_time}'"
+            "record_time >= ?",
+            "record_time <= ?"
         ]
+        params = [window_start, current_time]
 
         if service_name:
-            # Get transaction IDs for this service from service_logs
-            service_query = f"""
-                SELECT DISTINCT sid as transaction_id
-                FROM service_logs
-                WHERE service_name = '{service_name}'
-            """
-            service_df = self.db_manager.query(service_query)
-            if not service_df.empty:
-                transaction_ids = service_df['transaction_id'].tolist()
-                where_clauses.append(
-                    f"wm_transaction_id IN ({','.join(map(str, transaction_ids))})"
-                )
+            # Restrict to transaction IDs of this service in service_logs
+            where_clauses.append(
+                "wm_transaction_id IN (SELECT sid FROM service_logs WHERE service_name = ?)"
+            )
+            params.append(service_name)
 
         where_sql = " AND ".join(where_clauses)
 
@@ -203,38 +170,31 @@ class DegradationDetector:
             SELECT
                 error_codes,
                 COUNT(*) as occurrence_count,
-                SUM(error_count) as total_errors,
-                SUM(total_count) as total_requests,
-                AVG(response_time_avg) as avg_response_time
+                COALESCE(SUM(error_count), 0)::BIGINT as total_errors,
+                COALESCE(SUM(total_count), 0)::BIGINT as total_requests,
+                COALESCE(AVG(response_time_avg), 0.0) as avg_response_time
             FROM error_logs
             WHERE {where_sql}
             GROUP BY error_codes
             ORDER BY total_errors DESC
         """
 
-        df = self.db_manager.query(sql)
+        df = self.db_manager.query(sql, params)
 
         # Convert to distribution
-        distribution = []
-        total_errors_all = df['total_errors'].sum()
-
-        for _, row in df.iterrows():
-            # Handle NaN values safely
-            total_err = row['total_errors']
-            occ_count = row['occurrence_count']
-            percentage = (total_err / total_errors_all * 100) if (total_errors_all > 0 and pd.notna(total_err)) else 0
-            distribution.append({
-                'error_code': row['error_codes'],
-                'count': int(total_err) if pd.notna(total_err) else 0,
-                'percentage': percentage,
-                'occurrences': int(occ_count) if pd.notna(occ_count) else 0,
-                'avg_response_time': row['avg_response_time'] if pd.notna(row['avg_response_time']) else 0.0
-            })
+        total_errors_all = int(df['total_errors'].sum())
+        df['percentage'] = df['total_errors'] / total_errors_all * 100 if total_errors_all > 0 else 0
+
+        distribution = df.rename(columns={
+            'error_codes': 'error_code',
+            'total_errors': 'count',
+            'occurrence_count': 'occurrences'
+        })[['error_code', 'count', 'percentage', 'occurrences', 'avg_response_time']].to_dict('records')
 
         return {
             'service_name': service_name or 'all_services',
             'time_window_minutes': time_window_minutes,
-            'total_errors': int(total_errors_all) if (not df.empty and pd.notna(total_errors_all)) else 0,
+            'total_errors': total_errors_all,
             'distribution': distribution
         }
 
@@ -258,92 +218,105 @@ class DegradationDetector:
         current_time = time_range['max_time']
         window_start = current_time - timedelta(minutes=time_window_minutes)
 
-        sql = f"""
+        # Bin rows into at most VOLUME_TREND_MAX_POINTS fixed-width buckets so
+        # long windows don't return every raw row. Each bin is stamped with
+        # its first record_time; sums/counts let the summary use raw rows.
+        bin_seconds = max(1, -(-time_window_minutes * 60 // VOLUME_TREND_MAX_POINTS))
+        sql = """
             SELECT
-                record_time,
-                total_count,
-                error_count,
-                success_count,
-                error_rate,
-                response_time_avg
+                MIN(record_time) as record_time,
+                COALESCE(SUM(total_count), 0) as total_count,
+                COALESCE(SUM(error_count), 0) as error_count,
+                COALESCE(AVG(error_rate), 0.0) as error_rate,
+                COALESCE(AVG(response_time_avg), 0.0) as response_time_avg,
+                COALESCE(SUM(error_rate), 0.0) as error_rate_sum,
+                COUNT(error_rate) as error_rate_count,
+                COALESCE(SUM(response_time_avg), 0.0) as response_time_sum,
+                COUNT(response_time_avg) as response_time_count
             FROM service_logs
-            WHERE service_name = '{service_name}'
-                AND record_time >= '{window_start}'
-                AND record_time <= '{current_time}'
+            WHERE service_name = ?
+                AND record_time >= ?
+                AND record_time <= ?
+            GROUP BY LEAST(date_diff('second', ?::TIMESTAMP, record_time) // ?, ?)
             ORDER BY record_time ASC
         """
 
-        df = self.db_manager.query(sql)
+        rows = self.db_manager.query_rows(
+            sql,
+            [service_name, window_start, current_time, window_start, bin_seconds, VOLUME_TREND_MAX_POINTS - 1]
+        )
 
-        if df.empty:
+        if not rows:
             return {'error': f'No data found for service {service_name}'}
 
+        (_, total_counts, error_counts, _, _,
+         error_rate_sums, error_rate_counts, response_time_sums, response_time_counts) = zip(*rows)
+
         # Calculate trends
-        total_volume = df['total_count'].sum()
-        total_errors = df['error_count'].sum()
-        avg_error_rate = df['error_rate'].mean()
-        avg_response_time = df['response_time_avg'].mean()
+        error_rate_count = sum(error_rate_counts)
+        response_time_count = sum(response_time_counts)
 
         # Time series data
-        time_series = []
-        for _, row in df.iterrows():
-            # Handle NaN values safely
-            total_cnt = row['total_count']
-            err_cnt = row['error_count']
-            time_series.append({
-                'timestamp': str(row['record_time']),
-                'total_requests': int(total_cnt) if pd.notna(total_cnt) else 0,
-                'errors': int(err_cnt) if pd.notna(err_cnt) else 0,
-                'error_rate': row['error_rate'] if pd.notna(row['error_rate']) else 0.0,
-                'response_time': row['response_time_avg'] if pd.notna(row['response_time_avg']) else 0.0
-            })
+        time_series = [
+            {
+                'timestamp': str(record_time),
+                'total_requests': total_cnt,
+                'errors': err_cnt,
+                'error_rate': err_rate,
+                'response_time': resp_time
+            }
+            for record_time, total_cnt, err_cnt, err_rate, resp_time, *_ in rows
+        ]
 
         return {
             'service_name': service_name,
             'time_window_minutes': time_window_minutes,
             'summary': {
-                'total_volume': int(total_volume) if pd.notna(total_volume) else 0,
-                'total_errors': int(total_errors) if pd.notna(total_errors) else 0,
-                'avg_error_rate': avg_error_rate if pd.notna(avg_error_rate) else 0.0,
-                'avg_response_time': avg_response_time if pd.notna(avg_response_time) else 0.0
+                'total_volume': sum(total_counts),
+                'total_errors': sum(error_counts),
+                'avg_error_rate': sum(error_rate_sums) / error_rate_count if error_rate_count else 0.0,
+                'avg_response_time': sum(response_time_sums) / response_time_count if response_time_count else 0.0
             },
             'time_series': time_series
         }
 
     @staticmethod
-    def _calculate_percent_change(baseline: float, current: float) -> float:
-        """Calculate percentage change from baseline to current.
+    def _window_columns_sql(prefix: str, condition: str) -> str:
+        """Build the per-window aggregates for the degradation query.
+
+        Percentiles can't be averaged directly, so they are weighted by volume.
 
         Args:
-            baseline: Baseline value
-            current: Current value
+            prefix: Column name prefix for the window (e.g. 'recent')
+            condition: SQL condition selecting the window's rows
 
         Returns:
-            Percentage change
+            Comma-separated SQL aggregate columns
+        """
+        return f"""
+                    AVG(error_rate) FILTER (WHERE {condition}) as {prefix}_error_rate,
+                    AVG(response_time_avg) FILTER (WHERE {condition}) as {prefix}_response_time,
+                    {volume_weighted_sql('response_time_p95', condition)} as {prefix}_response_time_p95,
+                    {volume_weighted_sql('response_time_p99', condition)} as {prefix}_response_time_p99,
+                    SUM(total_count) FILTER (WHERE {condition}) as {prefix}_total_requests,
+                    SUM(error_count) FILTER (WHERE {condition}) as {prefix}_total_errors,
+                    COUNT(*) FILTER (WHERE {condition}) as {prefix}_rows
         """
-        if baseline == 0:
-            return 100.0 if current > 0 else 0.0
-        return ((current - baseline) / baseline) * 100
 
     @staticmethod
-    def _classify_severity(error_rate_change: float, response_time_change: float,
-                          p95_change: float = 0.0, p99_change: float = 0.0) -> str:
-        """Classify degradation severity.
+    def _percent_change_sql(baseline: str, current: str) -> str:
+        """Build a SQL expression for the percentage change from baseline to current.
+
+        A zero baseline counts as a 100% change if the current value is positive.
 
         Args:
-            error_rate_change: Error rate change percentage
-            response_time_change: Response time change percentage
-            p95_change: P95 latency change percentage
-            p99_change: P99 latency change percentage
+            baseline: Baseline column expression
+            current: Current column expression
 
         Returns:
-            Severity level: critical, warning, or minor
+            SQL CASE expression
         """
-        max_change = max(error_rate_change, response_time_change, p95_change, p99_change)
-
-        if max_change > 100:
-            return 'critical'
-        elif max_change > 50:
-            return 'warning'
-        else:
-            return 'minor'
+        return (
+            f"CASE WHEN {baseline} = 0 THEN (CASE WHEN {current} > 0 THEN 100.0 ELSE 0.0 END) "
+            f"ELSE ({current} - {baseline}) / {baseline} * 100 END"
+        )
@@ -1,13 +1,34 @@
 """Metrics aggregation and utilities."""
 
-import pandas as pd
 from typing import Dict, Any, List, Optional
 from data.database.duckdb_manager import DuckDBManager
+from analytics.slo_calculator import build_slo_violation
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+def volume_weighted_sql(column: str, condition: Optional[str] = None) -> str:
+    """Build a SQL aggregate for a request-volume weighted mean.
+
+    Pre-aggregated percentiles (P50/P95/P99) can't be averaged directly;
+    weighting each bucket by its total_count gives the right overall value.
+    Buckets without a value for the column are left out of the weights.
+
+    Args:
+        column: Column to aggregate
+        condition: Optional SQL condition limiting the rows aggregated
+
+    Returns:
+        SQL aggregate expression
+    """
+    row_filter = f" FILTER (WHERE {condition})" if condition else ""
+    return (
+        f"SUM({column} * total_count){row_filter} / "
+        f"NULLIF(SUM(CASE WHEN {column} IS NOT NULL THEN total_count END){row_filter}, 0)"
+    )
+
+
 class MetricsAggregator:
     """Aggregator for service metrics."""
 
@@ -28,32 +49,29 @@ class MetricsAggregator:
         Returns:
             List of top services
         """
-        sql = f"""
+        sql = """
             SELECT
                 service_name,
-                SUM(total_count) as total_requests,
-                AVG(error_rate) as avg_error_rate,
-                AVG(response_time_avg) as avg_response_time
+                COALESCE(SUM(total_count), 0) as total_requests,
+                COALESCE(AVG(error_rate), 0.0) as avg_error_rate,
+                COALESCE(AVG(response_time_avg), 0.0) as avg_response_time
             FROM service_logs
             GROUP BY service_name
             ORDER BY total_requests DESC
-            LIMIT {limit}
+            LIMIT ?
         """
 
-        df = self.db_manager.query(sql)
-
-        results = []
-        for _, row in df.iterrows():
-            # Handle NaN values safely
-            total_req = row['total_requests']
-            results.append({
-                'service_name': row['service_name'],
-                'total_requests': int(total_req) if pd.notna(total_req) else 0,
-                'avg_error_rate': row['avg_error_rate'] if pd.notna(row['avg_error_rate']) else 0.0,
-                'avg_response_time': row['avg_response_time'] if pd.notna(row['avg_response_time']) else 0.0
-            })
+        rows = self.db_manager.query_rows(sql, [limit])
 
-        return results
+        return [
+            {
+                'service_name': service_name,
+                'total_requests': total_req,
+                'avg_error_rate': avg_err_rate,
+                'avg_response_time': avg_rt
+            }
+            for service_name, total_req, avg_err_rate, avg_rt in rows
+        ]
 
     def get_top_errors(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get top error codes by frequency.
@@ -64,34 +82,30 @@ class MetricsAggregator:
         Returns:
             List of top errors
         """
-        sql = f"""
+        sql = """
             SELECT
                 error_codes,
                 COUNT(*) as occurrence_count,
-                SUM(error_count) as total_errors,
-                AVG(response_time_avg) as avg_response_time
+                COALESCE(SUM(error_count), 0) as total_errors,
+                COALESCE(AVG(response_time_avg), 0.0) as avg_response_time
             FROM error_logs
             WHERE error_count > 0
             GROUP BY error_codes
             ORDER BY total_errors DESC
-            LIMIT {limit}
+            LIMIT ?
         """
 
-        df = self.db_manager.query(sql)
+        rows = self.db_manager.query_rows(sql, [limit])
 
-        results = []
-        for _, row in df.iterrows():
-            # Handle NaN values safely
-            occ_count = row['occurrence_count']
-            tot_errors = row['total_errors']
-            results.append({
-                'error_code': row['error_codes'],
-                'occurrence_count': int(occ_count) if pd.notna(occ_count) else 0,
-                'total_errors': int(tot_errors) if pd.notna(tot_errors) else 0,
-                'avg_response_time': row['avg_response_time'] if pd.notna(row['avg_response_time']) else 0.0
-            })
-
-        return results
+        return [
+            {
+                'error_code': error_code,
+                'occurrence_count': occ_count,
+                'total_errors': tot_errors,
+                'avg_response_time': avg_rt
+            }
+            for error_code, occ_count, tot_errors, avg_rt in rows
+        ]
 
     def get_service_health_overview(self) -> Dict[str, Any]:
         """Get overall service health overview.
@@ -99,71 +113,140 @@ class MetricsAggregator:
         Returns:
             Dictionary with health metrics
         """
-        # Total services
-        total_services = len(self.db_manager.get_all_services())
-
-        # Services meeting SLO
-        slo_sql = """
+        # Bucket services by SLO status and total up volume in one query.
+        # Services with a missing metric or target are never healthy.
+        sql = """
+            WITH per_service AS (
+                SELECT
+                    service_name,
+                    AVG(error_rate) as avg_error_rate,
+                    AVG(response_time_avg) as avg_response_time,
+                    MAX(target_error_slo_perc) as error_slo_target,
+                    MAX(target_response_slo_sec) as response_slo_target
+                FROM service_logs
+                GROUP BY service_name
+            ),
+            status AS (
+                SELECT
+                    COALESCE(avg_error_rate <= error_slo_target
+                             AND avg_response_time <= response_slo_target, FALSE) as is_healthy,
+                    COALESCE(avg_error_rate > error_slo_target * 0.8
+                             OR avg_response_time > response_slo_target * 0.8, FALSE) as near_target
+                FROM per_service
+            )
             SELECT
-                service_name,
-                AVG(error_rate) as avg_error_rate,
-                AVG(response_time_avg) as avg_response_time,
-                MAX(target_error_slo_perc) as error_slo_target,
-                MAX(target_response_slo_sec) as response_slo_target
-            FROM service_logs
-            GROUP BY service_name
+                COUNT(*) as total_services,
+                COUNT(*) FILTER (WHERE is_healthy) as healthy_services,
+                COUNT(*) FILTER (WHERE NOT is_healthy AND near_target) as degraded_services,
+                COUNT(*) FILTER (WHERE NOT is_healthy AND NOT near_target) as violated_services,
+                (SELECT COALESCE(SUM(total_count), 0) FROM service_logs) as total_requests,
+                (SELECT COALESCE(SUM(error_count), 0) FROM service_logs) as total_errors
+            FROM status
         """
 
-        df = self.db_manager.query(slo_sql)
+        (total_services, healthy_count, degraded_count, violated_count,
+         total_requests, total_errors) = self.db_manager.query_rows(sql)[0]
 
-        healthy_count = 0
-        degraded_count = 0
-        violated_count = 0
-
-        for _, row in df.iterrows():
-            error_slo_met = row['avg_error_rate'] <= row['error_slo_target']
-            response_slo_met = row['avg_response_time'] <= row['response_slo_target']
+        overall_error_rate = (total_errors / total_requests * 100) if total_requests > 0 else 0
 
-            if error_slo_met and response_slo_met:
-                healthy_count += 1
-            elif not error_slo_met or not response_slo_met:
-                if row['avg_error_rate'] > row['error_slo_target'] * 0.8 or \
-                   row['avg_response_time'] > row['response_slo_target'] * 0.8:
-                    degraded_count += 1
-                else:
-                    violated_count += 1
+        return {
+            'total_services': total_services,
+            'healthy_services': healthy_count,
+            'degraded_services': degraded_count,
+            'violated_services': violated_count,
+            'total_requests': total_requests,
+            'total_errors': total_errors,
+            'overall_error_rate': overall_error_rate,
+            'health_percentage': (healthy_count / total_services * 100) if total_services > 0 else 0
+        }
 
-        # Total requests and errors
-        totals_sql = """
-            SELECT
-                SUM(total_count) as total_requests,
-                SUM(error_count) as total_errors
-            FROM service_logs
-        """
+    def get_dashboard_snapshot(self, top_limit: int = 5,
+                               violation_limit: Optional[int] = None) -> Dict[str, Any]:
+        """Get everything the dashboard shows from one aggregation.
 
-        totals_df = self.db_manager.query(totals_sql)
+        Health overview, top services by volume and SLO violations all derive
+        from the same per-service aggregates, so they are computed in a
+        single scan instead of three queries.
 
-        # Handle NaN values from empty table
-        if not totals_df.empty and pd.notna(totals_df['total_requests'].iloc[0]):
-            total_requests = int(totals_df['total_requests'].iloc[0])
-            total_errors = int(totals_df['total_errors'].iloc[0])
-        else:
-            total_requests = 0
-            total_errors = 0
+        Args:
+            top_limit: Number of top services by volume to return
+            violation_limit: Maximum number of violations to return (default: all)
 
-        overall_error_rate = (total_errors / total_requests * 100) if total_requests > 0 else 0
+        Returns:
+            Dictionary with 'health_overview' (as get_service_health_overview),
+            'top_services' (as get_top_services_by_volume) and 'violations'
+            (as SLOCalculator.get_slo_violations)
+        """
+        sql = """
+            WITH per_service AS (
+                SELECT
+                    service_name,
+                    SUM(total_count) as total_requests,
+                    SUM(error_count) as total_errors,
+                    AVG(error_rate) as avg_error_rate,
+                    AVG(response_time_avg) as avg_response_time,
+                    MAX(target_error_slo_perc) as error_slo_target,
+                    MAX(target_response_slo_sec) as response_slo_target
+                FROM service_logs
+                GROUP BY service_name
+            ),
+            status AS (
+                SELECT
+                    *,
+                    COALESCE(avg_error_rate <= error_slo_target, FALSE) as error_slo_met,
+                    COALESCE(avg_response_time <= response_slo_target, FALSE) as response_slo_met,
+                    error_slo_met AND response_slo_met as is_healthy,
+                    COALESCE(avg_error_rate > error_slo_target * 0.8
+                             OR avg_response_time > response_slo_target * 0.8, FALSE) as near_target
+                FROM per_service
+            )
+            SELECT
+                COUNT(*),
+                COUNT(*) FILTER (WHERE is_healthy),
+                COUNT(*) FILTER (WHERE NOT is_healthy AND near_target),
+                COUNT(*) FILTER (WHERE NOT is_healthy AND NOT near_target),
+                COALESCE(SUM(total_requests), 0),
+                COALESCE(SUM(total_errors), 0),
+                list_slice(list({
+                    'service_name': service_name,
+                    'total_requests': COALESCE(total_requests, 0),
+                    'avg_error_rate': COALESCE(avg_error_rate, 0.0),
+                    'avg_response_time': COALESCE(avg_response_time, 0.0)
+                } ORDER BY COALESCE(total_requests, 0) DESC), 1, ?),
+                list_slice(list({
+                    'service_name': service_name,
+                    'error_rate': avg_error_rate,
+                    'error_target': error_slo_target,
+                    'error_met': error_slo_met,
+                    'response_time': avg_response_time,
+                    'response_target': response_slo_target,
+                    'response_met': response_slo_met,
+                    'total_requests': total_requests
+                } ORDER BY total_requests DESC) FILTER (WHERE NOT is_healthy), 1, COALESCE(?, COUNT(*)))
+            FROM status
+        """
+        (total_services, healthy_count, degraded_count, violated_count,
+         total_requests, total_errors, top_rows, violation_rows) = self.db_manager.query_one(
+            sql, [top_limit, violation_limit]
+        )
 
-        return {
+        health_overview = {
             'total_services': total_services,
             'healthy_services': healthy_count,
             'degraded_services': degraded_count,
             'violated_services': violated_count,
             'total_requests': total_requests,
             'total_errors': total_errors,
-            'overall_error_rate': overall_error_rate,
+            'overall_error_rate': (total_errors / total_requests * 100) if total_requests > 0 else 0,
             'health_percentage': (healthy_count / total_services * 100) if total_services > 0 else 0
         }
 
+        return {
+            'health_overview': health_overview,
+            'top_services': top_rows or [],
+            'violations': [build_slo_violation(**row) for row in violation_rows or []]
+        }
+
     def get_slowest_services(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get slowest services by P99 latency (or average if P99 unavailable).
 
@@ -173,50 +256,55 @@ class MetricsAggregator:
         Returns:
             List of slowest services
         """
+        # Percentiles are weighted by request volume across time buckets.
+        # SLO check uses P99 if available, otherwise the average; a missing
+        # value or target counts as met. Unknown percentiles stay NULL.
         sql = f"""
+            WITH per_service AS (
+                SELECT
+                    service_name,
+                    AVG(response_time_avg) as avg_response_time,
+                    {volume_weighted_sql('response_time_p50')} as avg_p50,
+                    {volume_weighted_sql('response_time_p95')} as avg_p95,
+                    {volume_weighted_sql('response_time_p99')} as avg_p99,
+                    MAX(response_time_max) as max_response_time,
+                    MAX(target_response_slo_sec) as response_slo_target,
+                    SUM(total_count) as total_requests
+                FROM service_logs
+                GROUP BY service_name
+            )
             SELECT
                 service_name,
-                AVG(response_time_avg) as avg_response_time,
-                AVG(response_time_p50) as avg_p50,
-                AVG(response_time_p95) as avg_p95,
-                AVG(response_time_p99) as avg_p99,
-                MAX(response_time_max) as max_response_time,
-                MAX(target_response_slo_sec) as response_slo_target,
-                SUM(total_count) as total_requests
-            FROM service_logs
-            GROUP BY service_name
+                COALESCE(avg_response_time, 0.0),
+                avg_p50,
+                avg_p95,
+                avg_p99,
+                COALESCE(max_response_time, 0.0),
+                COALESCE(response_slo_target, 1.0),
+                COALESCE(total_requests, 0),
+                NOT COALESCE(COALESCE(avg_p99, avg_response_time) > response_slo_target, FALSE)
+            FROM per_service
             ORDER BY COALESCE(avg_p99, avg_response_time) DESC
-            LIMIT {limit}
+            LIMIT ?
         """
 
-        df = self.db_manager.query(sql)
-
-        results = []
-        for _, row in df.iterrows():
-            # Handle NaN values safely
-            total_req = row['total_requests']
-            avg_rt = row['avg_response_time']
-            avg_p99 = row['avg_p99']
-            avg_p95 = row['avg_p95']
-            avg_p50 = row['avg_p50']
-            slo_target = row['response_slo_target']
-
-            # Use P99 for SLO check if available, otherwise use average
-            check_value = avg_p99 if pd.notna(avg_p99) else avg_rt
-
-            results.append({
-                'service_name': row['service_name'],
-                'avg_response_time': avg_rt if pd.notna(avg_rt) else 0.0,
-                'response_time_p50': avg_p50 if pd.notna(avg_p50) else None,
-                'response_time_p95': avg_p95 if pd.notna(avg_p95) else None,
-                'response_time_p99': avg_p99 if pd.notna(avg_p99) else None,
-                'max_response_time': row['max_response_time'] if pd.notna(row['max_response_time']) else 0.0,
-                'response_slo_target': slo_target if pd.notna(slo_target) else 1.0,
-                'total_requests': int(total_req) if pd.notna(total_req) else 0,
-                'slo_met': (check_value <= slo_target) if (pd.notna(check_value) and pd.notna(slo_target)) else True
-            })
-
-        return results
+        rows = self.db_manager.query_rows(sql, [limit])
+
+        return [
+            {
+                'service_name': service_name,
+                'avg_response_time': avg_rt,
+                'response_time_p50': avg_p50,
+                'response_time_p95': avg_p95,
+                'response_time_p99': avg_p99,
+                'max_response_time': max_rt,
+                'response_slo_target': slo_target,
+                'total_requests': total_req,
+                'slo_met': slo_met
+            }
+            for service_name, avg_rt, avg_p50, avg_p95, avg_p99, max_rt, slo_target, total_req, slo_met
+            in rows
+        ]
 
     def get_error_prone_services(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get services with highest error rates.
@@ -227,39 +315,36 @@ class MetricsAggregator:
         Returns:
             List of error-prone services
         """
-        sql = f"""
+        # A missing error rate or target counts as met
+        sql = """
             SELECT
                 service_name,
                 AVG(error_rate) as avg_error_rate,
-                SUM(error_count) as total_errors,
-                SUM(total_count) as total_requests,
-                MAX(target_error_slo_perc) as error_slo_target
+                COALESCE(SUM(error_count), 0) as total_errors,
+                COALESCE(SUM(total_count), 0) as total_requests,
+                COALESCE(MAX(target_error_slo_perc), 0.0) as error_slo_target,
+                NOT COALESCE(AVG(error_rate) > MAX(target_error_slo_perc), FALSE) as slo_met
             FROM service_logs
             GROUP BY service_name
             HAVING avg_error_rate > 0
             ORDER BY avg_error_rate DESC
-            LIMIT {limit}
+            LIMIT ?
         """
 
-        df = self.db_manager.query(sql)
-
-        results = []
-        for _, row in df.iterrows():
-            # Handle NaN values safely
-            total_errors = row['total_errors']
-            total_requests = row['total_requests']
-            avg_err_rate = row['avg_error_rate']
-            slo_target = row['error_slo_target']
-            results.append({
-                'service_name': row['service_name'],
-                'avg_error_rate': avg_err_rate if pd.notna(avg_err_rate) else 0.0,
-                'total_errors': int(total_errors) if pd.notna(total_errors) else 0,
-                'total_requests': int(total_requests) if pd.notna(total_requests) else 0,
-                'error_slo_target': slo_target if pd.notna(slo_target) else 0.0,
-                'slo_met': (avg_err_rate <= slo_target) if (pd.notna(avg_err_rate) and pd.notna(slo_target)) else True
-            })
-
-        return results
+        rows = self.db_manager.query_rows(sql, [limit])
+
+        return [
+            {
+                'service_name': service_name,
+                'avg_error_rate': avg_err_rate,
+                'total_errors': total_errors,
+                'total_requests': total_requests,
+                'error_slo_target': slo_target,
+                'slo_met': slo_met
+            }
+            for service_name, avg_err_rate, total_errors, total_requests, slo_target, slo_met
+            in rows
+        ]
 
     def get_error_details_by_code(self, error_code: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Get detailed error logs for a specific error code.
@@ -271,32 +356,32 @@ class MetricsAggregator:
         Returns:
             List of error details with full log information
         """
-        sql = f"""
+        sql = """
             SELECT
-                wm_transaction_name,
+                COALESCE(wm_transaction_name, 'Unknown'),
                 error_codes,
-                error_details,
-                response_time_avg,
+                COALESCE(error_details, 'No details available'),
+                COALESCE(response_time_avg, 0.0),
                 record_time,
-                wm_application_name
+                COALESCE(wm_application_name, 'Unknown')
             FROM error_logs
-            WHERE error_codes = '{error_code}'
+            WHERE error_codes = ?
                 AND error_details IS NOT NULL
             ORDER BY record_time DESC
-            LIMIT {limit}
+            LIMIT ?
         """
 
-        df = self.db_manager.query(sql)
-
-        results = []
-        for _, row in df.iterrows():
-            results.append({
-                'transaction_name': row['wm_transaction_name'] if pd.notna(row['wm_transaction_name']) else 'Unknown',
-                'error_code': row['error_codes'],
-                'error_details': row['error_details'] if pd.notna(row['error_details']) else 'No details available',
-                'response_time': row['response_time_avg'] if pd.notna(row['response_time_avg']) else 0.0,
-                'timestamp': str(row['record_time']),
-                'application': row['wm_application_name'] if pd.notna(row['wm_application_name']) else 'Unknown'
-            })
-
-        return results
+        rows = self.db_manager.query_rows(sql, [error_code, limit])
+
+        return [
+            {
+                'transaction_name': transaction_name,
+                'error_code': error_code,
+                'error_details': error_details,
+                'response_time': response_time,
+                'timestamp': str(record_time),
+                'application': application
+            }
+            for transaction_name, error_code, error_details, response_time, record_time, application
+            in rows
+        ]
@@ -1,14 +1,74 @@
 """SLO calculator for computing SLI, error budgets, and burn rates."""
 
+import copy
+import threading
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
+from cachetools import TTLCache
 from data.database.duckdb_manager import DuckDBManager
 from utils.logger import setup_logger
 from utils.config import DEFAULT_ERROR_SLO_THRESHOLD, DEFAULT_RESPONSE_TIME_SLO
 
 logger = setup_logger(__name__)
 
+# SLI / summary results are reused while the data is unchanged, for at most this long
+SLI_CACHE_TTL_SECONDS = 30
+SLI_CACHE_MAX_SIZE = 256
+
+# SLI aggregates shared by the per-service and all-services queries. SLO
+# compliance flags are evaluated in DuckDB; a missing metric or target
+# counts as not met.
+SLI_COLUMNS_SQL = """
+    MAX(record_time) as last_update,
+    AVG(success_rate) as avg_success_rate,
+    AVG(error_rate) as avg_error_rate,
+    AVG(response_time_avg) as avg_response_time,
+    AVG(response_time_p50) as avg_response_time_p50,
+    AVG(response_time_p95) as avg_response_time_p95,
+    AVG(response_time_p99) as avg_response_time_p99,
+    SUM(total_count) as total_requests,
+    SUM(error_count) as total_errors,
+    MAX(target_error_slo_perc) as error_slo_target,
+    MAX(target_response_slo_sec) as response_slo_target,
+    COALESCE(avg_error_rate <= error_slo_target, FALSE) as error_slo_met,
+    COALESCE(avg_response_time <= response_slo_target, FALSE) as response_slo_met,
+    error_slo_met AND response_slo_met as overall_slo_met
+"""
+
+
+def build_slo_violation(service_name: str, error_rate: float, error_target: float, error_met: bool,
+                        response_time: float, response_target: float, response_met: bool,
+                        total_requests: Any) -> Dict[str, Any]:
+    """Describe why a service violates its SLO.
+
+    Args:
+        service_name: Name of the service
+        error_rate: Average error rate (%)
+        error_target: Error rate SLO target (%)
+        error_met: Whether the error rate SLO is met
+        response_time: Average response time (seconds)
+        response_target: Response time SLO target (seconds)
+        response_met: Whether the response time SLO is met
+        total_requests: Total request count
+
+    Returns:
+        Violation entry as returned by get_slo_violations
+    """
+    violation_reasons = []
+    if not error_met:
+        violation_reasons.append(f"Error rate {error_rate:.2f}% exceeds target {error_target:.2f}%")
+    if not response_met:
+        violation_reasons.append(f"Response time {response_time:.3f}s exceeds target {response_target:.3f}s")
+
+    return {
+        'service_name': service_name,
+        'violations': violation_reasons,
+        'error_rate': error_rate,
+        'response_time': response_time,
+        'total_requests': total_requests
+    }
+
 
 class SLOCalculator:
     """Calculator for SLO metrics and analysis."""
@@ -20,6 +80,32 @@ class SLOCalculator:
             db_manager: DuckDB manager instance
         """
         self.db_manager = db_manager
+        self._cache = TTLCache(maxsize=SLI_CACHE_MAX_SIZE, ttl=SLI_CACHE_TTL_SECONDS)
+        self._cache_lock = threading.Lock()
+
+    def _cached(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        """Return a cached result, keyed on the latest data timestamp.
+
+        New data moves max(record_time), so results computed before a reload
+        are never served afterwards. Callers get a copy they may modify.
+
+        Args:
+            key: Cache key identifying the call
+            compute: Function producing the result on a miss
+
+        Returns:
+            Copy of the (possibly cached) result
+        """
+        key = key + (self.db_manager.get_time_range()['max_time'],)
+        with self._cache_lock:
+            result = self._cache.get(key)
+
+        if result is None:
+            result = compute()
+            with self._cache_lock:
+                self._cache[key] = result
+
+        return result.copy() if isinstance(result, pd.DataFrame) else copy.deepcopy(result)
 
     def get_current_sli(self, service_name: Optional[str] = None) -> pd.DataFrame:
         """Get current SLI (Service Level Indicator) for services.
@@ -30,36 +116,52 @@ class SLOCalculator:
         Returns:
             DataFrame with current SLI metrics for each service
         """
-        where_clause = f"WHERE service_name = '{service_name}'" if service_name else ""
+        return self._cached(('current_sli', service_name or None), lambda: self._query_current_sli(service_name))
+
+    def _query_current_sli(self, service_name: Optional[str]) -> pd.DataFrame:
+        """Query current SLI metrics (uncached).
+
+        Args:
+            service_name: Optional service name filter
 
+        Returns:
+            DataFrame with current SLI metrics for each service
+        """
+        # One SQL text serves both the filtered and unfiltered case
         sql = f"""
             SELECT
                 service_name,
-                MAX(record_time) as last_update,
-                AVG(success_rate) as avg_success_rate,
-                AVG(error_rate) as avg_error_rate,
-                AVG(response_time_avg) as avg_response_time,
-                AVG(response_time_p50) as avg_response_time_p50,
-                AVG(response_time_p95) as avg_response_time_p95,
-                AVG(response_time_p99) as avg_response_time_p99,
-                SUM(total_count) as total_requests,
-                SUM(error_count) as total_errors,
-                MAX(target_error_slo_perc) as error_slo_target,
-                MAX(target_response_slo_sec) as response_slo_target
+                {SLI_COLUMNS_SQL}
             FROM service_logs
-            {where_clause}
+            WHERE $service_name IS NULL OR service_name = $service_name
             GROUP BY service_name
             ORDER BY total_requests DESC
         """
 
-        df = self.db_manager.query(sql)
+        return self.db_manager.query(sql, {'service_name': service_name or None})
+
+    def _query_service_sli(self, service_name: str) -> Optional[Dict[str, Any]]:
+        """Query current SLI metrics for a single service as a dict.
 
-        # Add SLO compliance flags
-        df['error_slo_met'] = df['avg_error_rate'] <= df['error_slo_target']
-        df['response_slo_met'] = df['avg_response_time'] <= df['response_slo_target']
-        df['overall_slo_met'] = df['error_slo_met'] & df['response_slo_met']
+        Aggregates the service's rows directly, without grouping or building
+        a DataFrame.
 
-        return df
+        Args:
+            service_name: Name of the service
+
+        Returns:
+            Dictionary with the same fields as a get_current_sli row, or None
+            if the service has no data
+        """
+        sql = f"""
+            SELECT
+                $service_name as service_name,
+                {SLI_COLUMNS_SQL}
+            FROM service_logs
+            WHERE service_name = $service_name
+        """
+        sli = self.db_manager.query_record(sql, {'service_name': service_name})
+        return sli if sli['last_update'] is not None else None
 
     def calculate_error_budget(self, service_name: str, time_window_hours: int = 4) -> Dict[str, Any]:
         """Calculate error budget for a service.
@@ -76,21 +178,71 @@ class SLOCalculator:
         end_time = datetime.now()
         start_time = end_time - timedelta(hours=time_window_hours)
 
-        df = self.db_manager.get_service_logs(
-            service_name=service_name,
-            start_time=start_time,
-            end_time=end_time
-        )
+        totals = self._get_window_totals(service_name, start_time, end_time)
+        return self._error_budget_from_totals(service_name, totals, time_window_hours)
+
+    def _get_window_totals(self, service_name: str, start_time: datetime, end_time: datetime,
+                           inner_start: Optional[datetime] = None) -> tuple:
+        """Aggregate request/error totals for a service over a time window.
+
+        Args:
+            service_name: Name of the service
+            start_time: Window start (inclusive)
+            end_time: Window end (inclusive)
+            inner_start: Optional start of a nested window ending at end_time,
+                aggregated in the same scan
+
+        Returns:
+            Tuple of (row count, total requests, total errors, error SLO target)
+            for the window, followed by the same four values for the nested
+            window when inner_start is given. The target is taken from the
+            latest record.
+        """
+        sql = """
+            SELECT
+                COUNT(*),
+                COALESCE(SUM(total_count), 0)::BIGINT,
+                COALESCE(SUM(error_count), 0)::BIGINT,
+                arg_max(target_error_slo_perc, record_time),
+                COUNT(*) FILTER (WHERE record_time >= $inner_start),
+                COALESCE(SUM(total_count) FILTER (WHERE record_time >= $inner_start), 0)::BIGINT,
+                COALESCE(SUM(error_count) FILTER (WHERE record_time >= $inner_start), 0)::BIGINT,
+                arg_max(target_error_slo_perc, record_time) FILTER (WHERE record_time >= $inner_start)
+            FROM service_logs
+            WHERE service_name = $service_name
+              AND record_time >= $start_time
+              AND record_time <= $end_time
+        """
+        totals = self.db_manager.query_one(sql, {
+            'service_name': service_name,
+            'start_time': start_time,
+            'end_time': end_time,
+            'inner_start': inner_start or start_time
+        })
+        return totals if inner_start else totals[:4]
+
+    def _error_budget_from_totals(self, service_name: str, totals: tuple,
+                                  time_window_hours: int) -> Dict[str, Any]:
+        """Calculate error budget from aggregated window totals.
+
+        Args:
+            service_name: Name of the service
+            totals: (row count, total requests, total errors, error SLO target)
+            time_window_hours: Time window in hours
+
+        Returns:
+            Dictionary with error budget metrics
+        """
+        row_count, total_requests, total_errors, error_slo_target = totals
 
-        if df.empty:
+        if not row_count:
             return {
                 'service_name': service_name,
                 'error': 'No data found for this service'
             }
 
-        total_requests = df['total_count'].sum()
-        total_errors = df['error_count'].sum()
-        error_slo_target = df['target_error_slo_perc'].iloc[0] if not df.empty else DEFAULT_ERROR_SLO_THRESHOLD
+        if error_slo_target is None:
+            error_slo_target = DEFAULT_ERROR_SLO_THRESHOLD
 
         # Error budget calculation
         error_budget = (error_slo_target / 100) * total_requests
@@ -98,15 +250,14 @@ class SLOCalculator:
         budget_remaining = error_budget - errors_consumed
         budget_consumed_percent = (errors_consumed / error_budget * 100) if error_budget > 0 else 0
 
-        # Handle NaN values safely
         return {
             'service_name': service_name,
             'time_window_hours': time_window_hours,
-            'total_requests': int(total_requests) if pd.notna(total_requests) else 0,
-            'total_errors': int(total_errors) if pd.notna(total_errors) else 0,
+            'total_requests': total_requests,
+            'total_errors': total_errors,
             'error_slo_target_percent': error_slo_target,
             'error_budget': error_budget,
-            'errors_consumed': int(errors_consumed) if pd.notna(errors_consumed) else 0,
+            'errors_consumed': errors_consumed,
             'budget_remaining': budget_remaining,
             'budget_consumed_percent': budget_consumed_percent,
             'status': 'healthy' if budget_remaining > 0 else 'budget_exceeded'
@@ -127,23 +278,33 @@ class SLOCalculator:
         end_time = datetime.now()
         start_time = end_time - timedelta(minutes=time_window_minutes)
 
-        df = self.db_manager.get_service_logs(
-            service_name=service_name,
-            start_time=start_time,
-            end_time=end_time
-        )
+        totals = self._get_window_totals(service_name, start_time, end_time)
+        return self._burn_rate_from_totals(service_name, totals, time_window_minutes)
+
+    def _burn_rate_from_totals(self, service_name: str, totals: tuple,
+                               time_window_minutes: int) -> Dict[str, Any]:
+        """Calculate burn rate from aggregated window totals.
+
+        Args:
+            service_name: Name of the service
+            totals: (row count, total requests, total errors, error SLO target)
+            time_window_minutes: Time window in minutes
 
-        if df.empty:
+        Returns:
+            Dictionary with burn rate metrics
+        """
+        row_count, total_requests, total_errors, error_slo_target = totals
+
+        if not row_count:
             return {
                 'service_name': service_name,
                 'error': 'No data found for this service'
             }
 
-        total_requests = df['total_count'].sum()
-        total_errors = df['error_count'].sum()
-        actual_error_rate = (total_errors / total_requests * 100) if total_requests > 0 else 0
+        if error_slo_target is None:
+            error_slo_target = DEFAULT_ERROR_SLO_THRESHOLD
 
-        error_slo_target = df['target_error_slo_perc'].iloc[0] if not df.empty else DEFAULT_ERROR_SLO_THRESHOLD
+        actual_error_rate = (total_errors / total_requests * 100) if total_requests > 0 else 0
 
         # Burn rate = actual error rate / SLO target
         burn_rate = actual_error_rate / error_slo_target if error_slo_target > 0 else 0
@@ -158,7 +319,6 @@ class SLOCalculator:
         else:
             severity = 'emergency'
 
-        # Handle NaN values safely
         return {
             'service_name': service_name,
             'time_window_minutes': time_window_minutes,
@@ -166,8 +326,8 @@ class SLOCalculator:
             'error_slo_target': error_slo_target,
             'burn_rate': burn_rate,
             'severity': severity,
-            'total_requests': int(total_requests) if pd.notna(total_requests) else 0,
-            'total_errors': int(total_errors) if pd.notna(total_errors) else 0
+            'total_requests': total_requests,
+            'total_errors': total_errors
         }
 
     def get_slo_violations(self) -> List[Dict[str, Any]]:
@@ -179,29 +339,27 @@ class SLOCalculator:
         sli_df = self.get_current_sli()
 
         # Filter services violating SLO
-        violations = sli_df[~sli_df['overall_slo_met']].copy()
-
-        violations_list = []
-        for _, row in violations.iterrows():
-            violation_reasons = []
-            if not row['error_slo_met']:
-                violation_reasons.append(f"Error rate {row['avg_error_rate']:.2f}% exceeds target {row['error_slo_target']:.2f}%")
-            if not row['response_slo_met']:
-                violation_reasons.append(f"Response time {row['avg_response_time']:.3f}s exceeds target {row['response_slo_target']:.3f}s")
-
-            violations_list.append({
-                'service_name': row['service_name'],
-                'violations': violation_reasons,
-                'error_rate': row['avg_error_rate'],
-                'response_time': row['avg_response_time'],
-                'total_requests': row['total_requests']
-            })
-
-        return violations_list
+        violations = sli_df.loc[~sli_df['overall_slo_met'], [
+            'service_name', 'avg_error_rate', 'error_slo_target', 'error_slo_met',
+            'avg_response_time', 'response_slo_target', 'response_slo_met', 'total_requests'
+        ]]
+
+        return [build_slo_violation(*row) for row in violations.itertuples(index=False, name=None)]
 
     def get_service_summary(self, service_name: str) -> Dict[str, Any]:
         """Get comprehensive summary for a service.
 
+        Args:
+            service_name: Name of the service
+
+        Returns:
+            Dictionary with service metrics summary
+        """
+        return self._cached(('service_summary', service_name), lambda: self._build_service_summary(service_name))
+
+    def _build_service_summary(self, service_name: str) -> Dict[str, Any]:
+        """Build the service summary (uncached).
+
         Args:
             service_name: Name of the service
 
@@ -209,18 +367,24 @@ class SLOCalculator:
             Dictionary with service metrics summary
         """
         # Get current SLI
-        sli_df = self.get_current_sli(service_name)
+        sli = self._query_service_sli(service_name)
 
-        if sli_df.empty:
+        if sli is None:
             return {'error': f'Service {service_name} not found'}
 
-        sli = sli_df.iloc[0].to_dict()
-
-        # Get error budget
-        error_budget = self.calculate_error_budget(service_name)
+        # Aggregate the error budget window and the burn rate window nested
+        # inside it in one scan
+        budget_hours, burn_minutes = 4, 30
+        end_time = datetime.now()
+        totals = self._get_window_totals(
+            service_name,
+            start_time=end_time - timedelta(hours=budget_hours),
+            end_time=end_time,
+            inner_start=end_time - timedelta(minutes=burn_minutes)
+        )
 
-        # Get burn rate
-        burn_rate = self.calculate_burn_rate(service_name)
+        error_budget = self._error_budget_from_totals(service_name, totals[:4], budget_hours)
+        burn_rate = self._burn_rate_from_totals(service_name, totals[4:], burn_minutes)
 
         return {
             'service_name': service_name,
@@ -228,9 +392,9 @@ class SLOCalculator:
                 'success_rate': sli['avg_success_rate'],
                 'error_rate': sli['avg_error_rate'],
                 'response_time_avg': sli['avg_response_time'],
-                'response_time_p50': sli.get('avg_response_time_p50') if pd.notna(sli.get('avg_response_time_p50')) else None,
-                'response_time_p95': sli.get('avg_response_time_p95') if pd.notna(sli.get('avg_response_time_p95')) else None,
-                'response_time_p99': sli.get('avg_response_time_p99') if pd.notna(sli.get('avg_response_time_p99')) else None,
+                'response_time_p50': sli['avg_response_time_p50'],
+                'response_time_p95': sli['avg_response_time_p95'],
+                'response_time_p99': sli['avg_response_time_p99'],
                 'total_requests': sli['total_requests']
             },
             'slo_targets': {
@@ -1,7 +1,5 @@
 """Trend analyzer for predicting service issues."""
 
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 from data.database.duckdb_manager import DuckDBManager
@@ -35,14 +33,11 @@ class TrendAnalyzer:
             logger.warning("No data available")
             return []
 
-        current_time = time_range['max_time']
-
         # Analyze all services
-        services = self.db_manager.get_all_services()
         predictions = []
 
-        for service in services:
-            prediction = self._analyze_service_trend(service, current_time)
+        for stats in self._get_service_trend_stats():
+            prediction = self._analyze_service_trend(stats)
             if prediction and prediction.get('risk_level') in ['high', 'critical']:
                 predictions.append(prediction)
 
@@ -52,35 +47,66 @@ class TrendAnalyzer:
         logger.info(f"Predicted {len(predictions)} services with potential issues")
         return predictions
 
-    def _analyze_service_trend(self, service_name: str, current_time: datetime) -> Optional[Dict[str, Any]]:
+    def _get_service_trend_stats(self) -> List[Dict[str, Any]]:
+        """Get trend statistics for every service in one query.
+
+        Slopes are least-squares fits of each metric against the row's
+        position in time order (0, 1, 2, ...). Latest values come from each
+        service's most recent row. Services with fewer than 3 data points
+        are skipped.
+
+        Returns:
+            List of per-service statistics (NaN where a value is missing)
+        """
+        sql = """
+            WITH ordered AS (
+                SELECT
+                    service_name,
+                    error_rate,
+                    response_time_avg,
+                    target_error_slo_perc,
+                    target_response_slo_sec,
+                    total_count,
+                    row_number() OVER (PARTITION BY service_name ORDER BY record_time) - 1 as position,
+                    COUNT(*) OVER (PARTITION BY service_name) as data_points
+                FROM service_logs
+            )
+            SELECT
+                service_name,
+                COALESCE(regr_slope(error_rate, position), 0.0) as error_rate_slope,
+                COALESCE(regr_slope(response_time_avg, position), 0.0) as response_time_slope,
+                stddev_samp(error_rate) as error_rate_std,
+                MAX(error_rate) FILTER (WHERE position = data_points - 1) as current_error_rate,
+                MAX(response_time_avg) FILTER (WHERE position = data_points - 1) as current_response_time,
+                MAX(target_error_slo_perc) FILTER (WHERE position = data_points - 1) as error_slo_target,
+                MAX(target_response_slo_sec) FILTER (WHERE position = data_points - 1) as response_slo_target,
+                COALESCE(MAX(total_count) FILTER (WHERE position = data_points - 1), 0)::BIGINT as total_count
+            FROM ordered
+            GROUP BY service_name
+            HAVING COUNT(*) >= 3
+        """
+        return self.db_manager.query(sql).to_dict('records')
+
+    def _analyze_service_trend(self, stats: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Analyze trend for a single service.
 
         Args:
-            service_name: Service name
-            current_time: Current timestamp
+            stats: Per-service statistics from _get_service_trend_stats
 
         Returns:
             Dictionary with prediction results or None
         """
-        # Get service data for trend analysis (full time range)
-        df = self.db_manager.get_service_logs(service_name=service_name)
+        service_name = stats['service_name']
 
-        if df.empty or len(df) < 3:
-            return None
-
-        # Sort by time
-        df = df.sort_values('record_time')
+        # Trends
+        error_rate_trend = stats['error_rate_slope']
+        response_time_trend = stats['response_time_slope']
 
-        # Calculate trends
-        error_rate_trend = self._calculate_linear_trend(df['error_rate'].values)
-        response_time_trend = self._calculate_linear_trend(df['response_time_avg'].values)
-
-        # Get current metrics
-        latest = df.iloc[-1]
-        current_error_rate = latest['error_rate']
-        current_response_time = latest['response_time_avg']
-        error_slo_target = latest['target_error_slo_perc']
-        response_slo_target = latest['target_response_slo_sec']
+        # Current metrics
+        current_error_rate = stats['current_error_rate']
+        current_response_time = stats['current_response_time']
+        error_slo_target = stats['error_slo_target']
+        response_slo_target = stats['response_slo_target']
 
         # Calculate risk factors
         risk_factors = []
@@ -107,7 +133,7 @@ class TrendAnalyzer:
             risk_score += 25
 
         # Volatility in error rate
-        error_rate_std = df['error_rate'].std()
+        error_rate_std = stats['error_rate_std']
         if error_rate_std > 5:  # High volatility
             risk_factors.append(f"High error rate volatility (std: {error_rate_std:.2f})")
             risk_score += 15
@@ -135,8 +161,6 @@ class TrendAnalyzer:
         if not risk_factors:
             return None
 
-        # Handle NaN values safely
-        total_cnt = latest['total_count']
         return {
             'service_name': service_name,
             'risk_level': risk_level,
@@ -145,7 +169,7 @@ class TrendAnalyzer:
             'current_metrics': {
                 'error_rate': current_error_rate,
                 'response_time': current_response_time,
-                'total_requests': int(total_cnt) if pd.notna(total_cnt) else 0
+                'total_requests': stats['total_count']
             },
             'slo_targets': {
                 'error_rate_target': error_slo_target,
@@ -166,59 +190,91 @@ class TrendAnalyzer:
         Returns:
             Dictionary with historical pattern analysis
         """
-        df = self.db_manager.get_service_logs(service_name=service_name)
+        # All summary statistics in one scan (quantiles interpolate linearly,
+        # std is the sample std, matching pandas)
+        stats_sql = """
+            SELECT
+                COUNT(*),
+                MIN(record_time),
+                MAX(record_time),
+                AVG(error_rate),
+                stddev_samp(error_rate),
+                MIN(error_rate),
+                MAX(error_rate),
+                quantile_cont(error_rate, [0.5, 0.95, 0.99]),
+                AVG(response_time_avg),
+                stddev_samp(response_time_avg),
+                MIN(response_time_min),
+                MAX(response_time_max),
+                quantile_cont(response_time_avg, [0.5, 0.95, 0.99]),
+                COALESCE(SUM(total_count), 0),
+                COALESCE(AVG(total_count), 0.0),
+                COALESCE(MAX(total_count), 0),
+                COALESCE(MIN(total_count), 0)
+            FROM service_logs
+            WHERE service_name = ?
+        """
+        (data_points, start_time, end_time,
+         er_mean, er_std, er_min, er_max, er_quantiles,
+         rt_mean, rt_std, rt_min, rt_max, rt_quantiles,
+         total_requests, avg_requests, peak_requests, min_requests) = self.db_manager.query_rows(stats_sql, [service_name])[0]
 
-        if df.empty:
+        if not data_points:
             return {'error': f'No data found for service {service_name}'}
 
-        df = df.sort_values('record_time')
+        er_quantiles = er_quantiles or [None, None, None]
+        rt_quantiles = rt_quantiles or [None, None, None]
 
-        # Calculate statistics
         error_rate_stats = {
-            'mean': df['error_rate'].mean(),
-            'std': df['error_rate'].std(),
-            'min': df['error_rate'].min(),
-            'max': df['error_rate'].max(),
-            'p50': df['error_rate'].median(),
-            'p95': df['error_rate'].quantile(0.95),
-            'p99': df['error_rate'].quantile(0.99)
+            'mean': er_mean,
+            'std': er_std,
+            'min': er_min,
+            'max': er_max,
+            'p50': er_quantiles[0],
+            'p95': er_quantiles[1],
+            'p99': er_quantiles[2]
         }
 
         response_time_stats = {
-            'mean': df['response_time_avg'].mean(),
-            'std': df['response_time_avg'].std(),
-            'min': df['response_time_min'].min(),
-            'max': df['response_time_max'].max(),
-            'p50': df['response_time_avg'].median(),
-            'p95': df['response_time_avg'].quantile(0.95),
-            'p99': df['response_time_avg'].quantile(0.99)
+            'mean': rt_mean,
+            'std': rt_std,
+            'min': rt_min,
+            'max': rt_max,
+            'p50': rt_quantiles[0],
+            'p95': rt_quantiles[1],
+            'p99': rt_quantiles[2]
         }
 
-        # Traffic patterns (handle NaN values safely)
-        total_req_sum = df['total_count'].sum()
-        peak_req = df['total_count'].max()
-        min_req = df['total_count'].min()
         traffic_stats = {
-            'total_requests': int(total_req_sum) if pd.notna(total_req_sum) else 0,
-            'avg_requests_per_period': df['total_count'].mean() if pd.notna(df['total_count'].mean()) else 0.0,
-            'peak_requests': int(peak_req) if pd.notna(peak_req) else 0,
-            'min_requests': int(min_req) if pd.notna(min_req) else 0
+            'total_requests': total_requests,
+            'avg_requests_per_period': avg_requests,
+            'peak_requests': peak_requests,
+            'min_requests': min_requests
         }
 
         # Time-based patterns
-        df['hour'] = pd.to_datetime(df['record_time']).dt.hour
-        hourly_patterns = df.groupby('hour').agg({
-            'error_rate': 'mean',
-            'response_time_avg': 'mean',
-            'total_count': 'sum'
-        }).to_dict('index')
+        hourly_sql = """
+            SELECT
+                hour(record_time) as hour,
+                AVG(error_rate),
+                AVG(response_time_avg),
+                COALESCE(SUM(total_count), 0)
+            FROM service_logs
+            WHERE service_name = ?
+            GROUP BY hour
+            ORDER BY hour
+        """
+        hourly_patterns = {
+            hour: {'error_rate': error_rate, 'response_time_avg': response_time, 'total_count': total_count}
+            for hour, error_rate, response_time, total_count in self.db_manager.query_rows(hourly_sql, [service_name])
+        }
 
         return {
             'service_name': service_name,
-            'data_points': len(df),
+            'data_points': data_points,
             'time_range': {
-                'start': str(df['record_time'].min()),
-                'end': str(df['record_time'].max())
+                'start': str(start_time),
+                'end': str(end_time)
             },
             'error_rate_stats': error_rate_stats,
             'response_time_stats': response_time_stats,
@@ -237,24 +293,41 @@ class TrendAnalyzer:
         """
         comparisons = []
 
-        for service in service_names:
-            df = self.db_manager.get_service_logs(service_name=service)
+        if not service_names:
+            return {'services': comparisons, 'comparison_count': 0}
+
+        # SLO targets come from each service's latest record
+        placeholders = ', '.join('?' for _ in service_names)
+        sql = f"""
+            SELECT
+                service_name,
+                AVG(error_rate) as avg_error_rate,
+                AVG(response_time_avg) as avg_response_time,
+                COALESCE(SUM(total_count), 0)::BIGINT as total_requests,
+                COALESCE(SUM(error_count), 0)::BIGINT as total_errors,
+                arg_max(target_error_slo_perc, record_time) as error_rate_target,
+                arg_max(target_response_slo_sec, record_time) as response_time_target
+            FROM service_logs
+            WHERE service_name IN ({placeholders})
+            GROUP BY service_name
+        """
+        stats = {row[0]: row for row in self.db_manager.query_rows(sql, list(service_names))}
 
-            if df.empty:
+        # Keep the caller's ordering
+        for service in service_names:
+            if service not in stats:
                 continue
 
-            # Handle NaN values safely
-            total_req = df['total_count'].sum()
-            total_err = df['error_count'].sum()
+            _, avg_error_rate, avg_response_time, total_req, total_err, error_target, response_target = stats[service]
             comparisons.append({
                 'service_name': service,
-                'avg_error_rate': df['error_rate'].mean(),
-                'avg_response_time': df['response_time_avg'].mean(),
-                'total_requests': int(total_req) if pd.notna(total_req) else 0,
-                'total_errors': int(total_err) if pd.notna(total_err) else 0,
+                'avg_error_rate': avg_error_rate,
+                'avg_response_time': avg_response_time,
+                'total_requests': total_req,
+                'total_errors': total_err,
                 'slo_compliance': {
-                    'error_rate_target': df['target_error_slo_perc'].iloc[0],
-                    'response_time_target': df['target_response_slo_sec'].iloc[0]
+                    'error_rate_target': error_target,
+                    'response_time_target': response_target
                 }
             })
 
@@ -263,24 +336,6 @@ class TrendAnalyzer:
             'comparison_count': len(comparisons)
         }
 
-    @staticmethod
-    def _calculate_linear_trend(values: np.ndarray) -> float:
-        """Calculate linear trend (slope) for a series of values.
-
-        Args:
-            values: Array of values
-
-        Returns:
-            Slope of the linear trend
-        """
-        if len(values) < 2:
-            return 0.0
-
-        x = np.arange(len(values))
-        # Simple linear regression
-        slope = np.polyfit(x, values, 1)[0]
-        return float(slope)
-
     def get_anomalies(self, service_name: str, threshold_std: float = 2.0) -> List[Dict[str, Any]]:
         """Detect anomalies in service metrics.
 
@@ -291,40 +346,46 @@ class TrendAnalyzer:
         Returns:
             List of detected anomalies
         """
-        df = self.db_manager.get_service_logs(service_name=service_name)
-
-        if df.empty:
-            return []
-
-        df = df.sort_values('record_time')
-
-        # Calculate statistics
-        error_rate_mean = df['error_rate'].mean()
-        error_rate_std = df['error_rate'].std()
-        response_time_mean = df['response_time_avg'].mean()
-        response_time_std = df['response_time_avg'].std()
+        # z-scores against the service's whole history (sample std, as in
+        # pandas); a zero or undefined std gives a z-score of 0
+        sql = """
+            WITH scored AS (
+                SELECT
+                    record_time,
+                    error_rate,
+                    response_time_avg,
+                    CASE WHEN stddev_samp(error_rate) OVER () > 0
+                        THEN abs(error_rate - AVG(error_rate) OVER ()) / stddev_samp(error_rate) OVER ()
+                        ELSE 0 END as error_rate_zscore,
+                    CASE WHEN stddev_samp(response_time_avg) OVER () > 0
+                        THEN abs(response_time_avg - AVG(response_time_avg) OVER ()) / stddev_samp(response_time_avg) OVER ()
+                        ELSE 0 END as response_time_zscore
+                FROM service_logs
+                WHERE service_name = ?
+            )
+            SELECT *
+            FROM scored
+            WHERE error_rate_zscore > ? OR response_time_zscore > ?
+            ORDER BY record_time
+        """
+        rows = self.db_manager.query_rows(sql, [service_name, threshold_std, threshold_std])
 
         anomalies = []
 
-        for _, row in df.iterrows():
-            # Check for error rate anomalies
-            error_rate_zscore = abs(row['error_rate'] - error_rate_mean) / error_rate_std if error_rate_std > 0 else 0
-            response_time_zscore = abs(row['response_time_avg'] - response_time_mean) / response_time_std if response_time_std > 0 else 0
-
-            if error_rate_zscore > threshold_std or response_time_zscore > threshold_std:
-                anomaly_type = []
-                if error_rate_zscore > threshold_std:
-                    anomaly_type.append('error_rate')
-                if response_time_zscore > threshold_std:
-                    anomaly_type.append('response_time')
-
-                anomalies.append({
-                    'timestamp': str(row['record_time']),
-                    'anomaly_type': anomaly_type,
-                    'error_rate': row['error_rate'],
-                    'error_rate_zscore': error_rate_zscore,
-                    'response_time': row['response_time_avg'],
-                    'response_time_zscore': response_time_zscore
-                })
+        for record_time, error_rate, response_time, error_rate_zscore, response_time_zscore in rows:
+            anomaly_type = []
+            if error_rate_zscore is not None and error_rate_zscore > threshold_std:
+                anomaly_type.append('error_rate')
+            if response_time_zscore is not None and response_time_zscore > threshold_std:
+                anomaly_type.append('response_time')
+
+            anomalies.append({
+                'timestamp': str(record_time),
+                'anomaly_type': anomaly_type,
+                'error_rate': error_rate,
+                'error_rate_zscore': error_rate_zscore,
+                'response_time': response_time,
+                'response_time_zscore': response_time_zscore
+            })
 
         return anomalies
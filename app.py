@@ -1,225 +1,31 @@
 """Streamlit web UI for SLO chatbot."""
 
 import streamlit as st
-import pandas as pd
 from pathlib import Path
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
+import traceback
+from datetime import datetime, timedelta
 
 # Import our modules
 from data.database.duckdb_manager import DuckDBManager
 from data.ingestion.data_loader import DataLoader
-from data.ingestion.opensearch_client import OpenSearchClient
 from analytics.slo_calculator import SLOCalculator
 from analytics.degradation_detector import DegradationDetector
 from analytics.trend_analyzer import TrendAnalyzer
 from analytics.metrics import MetricsAggregator
 from agent.claude_client import ClaudeClient
 from agent.function_tools import FunctionExecutor, TOOLS
-from utils.config import PROJECT_ROOT
+from utils.config import PROJECT_ROOT, DASHBOARD_CACHE_TTL_SECONDS, CHAT_HISTORY_MAX_TURNS, MAX_RESULT_WINDOW
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
-# Page configuration
-st.set_page_config(
-    page_title="SLO Chatbot",
-    page_icon="📊",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: bold;
-        color: #1f77b4;
-        margin-bottom: 1rem;
-    }
-    .metric-card {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin: 0.5rem 0;
-    }
-    .chat-message {
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin: 0.5rem 0;
-    }
-    .user-message {
-        background-color: #e3f2fd;
-    }
-    .assistant-message {
-        background-color: #f5f5f5;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-
-@st.cache_resource
-def initialize_system():
-    """Initialize all system components."""
-    logger.info("Initializing SLO chatbot system")
-
-    # Initialize database manager
-    db_manager = DuckDBManager()
-
-    # Initialize analytics components
-    slo_calculator = SLOCalculator(db_manager)
-    degradation_detector = DegradationDetector(db_manager)
-    trend_analyzer = TrendAnalyzer(db_manager)
-    metrics_aggregator = MetricsAggregator(db_manager)
-
-    # Initialize function executor
-    function_executor = FunctionExecutor(
-        slo_calculator=slo_calculator,
-        degradation_detector=degradation_detector,
-        trend_analyzer=trend_analyzer,
-        metrics_aggregator=metrics_aggregator
-    )
-
-    # Initialize Claude client
-    claude_client = ClaudeClient()
+# Preset refresh windows; "Custom" is offered alongside these
+TIME_RANGE_OPTIONS = {
+    "Last 4 hours": timedelta(hours=4)
+}
 
-    # Initialize data loader
-    data_loader = DataLoader(db_manager)
-
-    logger.info("System initialization complete")
-
-    return {
-        'db_manager': db_manager,
-        'slo_calculator': slo_calculator,
-        'degradation_detector': degradation_detector,
-        'trend_analyzer': trend_analyzer,
-        'metrics_aggregator': metrics_aggregator,
-        'function_executor': function_executor,
-        'claude_client': claude_client,
-        'data_loader': data_loader
-    }
-
-
-# JSON file loading removed - data now only comes from OpenSearch
-# def load_initial_data(data_loader):
-#     """Load initial data from JSON files."""
-#     service_logs_path = PROJECT_ROOT / "ServiceLogs7Amto11Am31Dec2025.json"
-#     error_logs_path = PROJECT_ROOT / "ErrorLogs7Amto11Am31Dec2025.json"
-#
-#     if service_logs_path.exists() and error_logs_path.exists():
-#         with st.spinner("Loading service and error logs..."):
-#             data_loader.load_and_store_all(str(service_logs_path), str(error_logs_path))
-#         st.success("Data loaded successfully!")
-#         return True
-#     else:
-#         st.error("Log files not found!")
-#         return False
-
-
-def display_dashboard(components):
-    """Display dashboard with key metrics."""
-    st.markdown("<h2>Service Health Dashboard</h2>", unsafe_allow_html=True)
-
-    # Get health overview
-    health_overview = components['metrics_aggregator'].get_service_health_overview()
-
-    # Display metrics in columns
-    col1, col2, col3, col4 = st.columns(4)
-
-    with col1:
-        st.metric(
-            "Total Services",
-            health_overview['total_services'],
-            help="Total number of services"
-        )
-
-    with col2:
-        st.metric(
-            "Healthy Services",
-            health_overview['healthy_services'],
-            f"{health_overview['health_percentage']:.1f}%",
-            help="Services meeting SLO targets"
-        )
-
-    with col3:
-        st.metric(
-            "Degraded Services",
-            health_overview['degraded_services'],
-            help="Services approaching SLO limits"
-        )
-
-    with col4:
-        st.metric(
-            "Violated Services",
-            health_overview['violated_services'],
-            help="Services violating SLO"
-        )
-
-    # Overall metrics
-    col1, col2 = st.columns(2)
-
-    with col1:
-        total_req = health_overview.get('total_requests', 0)
-        st.metric(
-            "Total Requests",
-            f"{total_req:,}" if total_req else "0",
-            help="Total request count"
-        )
-
-    with col2:
-        error_rate = health_overview.get('overall_error_rate', 0)
-        st.metric(
-            "Overall Error Rate",
-            f"{error_rate:.2f}%" if error_rate else "0.00%",
-            help="System-wide error rate"
-        )
-
-    # Top services by volume
-    st.markdown("<h3>Top Services by Volume</h3>", unsafe_allow_html=True)
-    top_services = components['metrics_aggregator'].get_top_services_by_volume(limit=5)
-
-    if top_services:
-        df = pd.DataFrame(top_services)
-        fig = px.bar(
-            df,
-            x='service_name',
-            y='total_requests',
-            title='Top 5 Services by Request Volume',
-            labels={'service_name': 'Service', 'total_requests': 'Total Requests'}
-        )
-        fig.update_xaxes(tickangle=-45)
-        st.plotly_chart(fig, use_container_width=True)
-
-    # SLO violations
-    violations = components['slo_calculator'].get_slo_violations()
-    if violations:
-        st.markdown("<h3>⚠️ Current SLO Violations</h3>", unsafe_allow_html=True)
-        for violation in violations[:5]:
-            with st.expander(f"🔴 {violation['service_name']}"):
-                st.write(f"**Error Rate:** {violation['error_rate']:.2f}%")
-                st.write(f"**Response Time:** {violation['response_time']:.3f}s")
-                st.write("**Violations:**")
-                for reason in violation['violations']:
-                    st.write(f"- {reason}")
-
-
-def display_chat(components):
-    """Display chat interface."""
-    st.markdown("<h2>💬 SLO Assistant</h2>", unsafe_allow_html=True)
-
-    # Initialize chat history
-    if 'messages' not in st.session_state:
-        st.session_state.messages = []
-
-    # Display chat history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-
-    # System prompt for Claude
-    system_prompt = """You are a Conversational SLO & Reliability Analysis Assistant.
+# System prompt for Claude (built once at import, not on every rerun)
+SYSTEM_PROMPT = """You are a Conversational SLO & Reliability Analysis Assistant.
 
 Your role is to analyze SERVICE logs and ERROR logs coming from an OpenSearch index and produce clear, reliable, and structured SLO insights.
 
@@ -376,6 +182,7 @@ IMPORTANT BEHAVIOR RULES:
 - **Flag tail latency issues**: If P99 >> P95 or P95 >> P50, warn about inconsistent performance
 - **LIMITED DATA HANDLING**: If asked for multi-day/time-of-day patterns but only have hours of data, respond: "Insufficient historical data. Need 7+ days for time-of-day analysis. Current data: [X hours]. Can analyze: current health, trends within available window."
 - **AVOID TOOL OVERUSE**: Don't call more than 5-7 tools per query. If question requires extensive analysis beyond available data, explain limitation instead of calling every possible tool.
+- **BATCH INDEPENDENT TOOL CALLS**: When several tools don't depend on each other's results, request them all in the same response instead of one per turn. They run in parallel and save a round trip each.
 
 DEFAULT TONE:
 Professional SRE / Reliability Engineer
@@ -395,6 +202,314 @@ BAD: "Service looks fine, average latency is stable" (WRONG - ignores percentile
 
 """
 
+# Page configuration
+st.set_page_config(
+    page_title="SLO Chatbot",
+    page_icon="📊",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Custom CSS
+st.markdown("""
+<style>
+    .main-header {
+        font-size: 2.5rem;
+        font-weight: bold;
+        color: #1f77b4;
+        margin-bottom: 1rem;
+    }
+    .metric-card {
+        background-color: #f0f2f6;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        margin: 0.5rem 0;
+    }
+    .chat-message {
+        padding: 1rem;
+        border-radius: 0.5rem;
+        margin: 0.5rem 0;
+    }
+    .user-message {
+        background-color: #e3f2fd;
+    }
+    .assistant-message {
+        background-color: #f5f5f5;
+    }
+</style>
+""", unsafe_allow_html=True)
+
+
+# Each component is created on first use and cached for the process, so a
+# rerun only pays for what it touches (e.g. Bedrock auth waits for the first
+# chat message).
+
+@st.cache_resource
+def get_db_manager():
+    """Create the DuckDB manager."""
+    logger.info("Initializing DuckDB manager")
+    return DuckDBManager()
+
+
+@st.cache_resource
+def get_slo_calculator():
+    """Create the SLO calculator."""
+    return SLOCalculator(get_db_manager())
+
+
+@st.cache_resource
+def get_degradation_detector():
+    """Create the degradation detector."""
+    return DegradationDetector(get_db_manager())
+
+
+@st.cache_resource
+def get_trend_analyzer():
+    """Create the trend analyzer."""
+    return TrendAnalyzer(get_db_manager())
+
+
+@st.cache_resource
+def get_metrics_aggregator():
+    """Create the metrics aggregator."""
+    return MetricsAggregator(get_db_manager())
+
+
+@st.cache_resource
+def get_function_executor():
+    """Create the function executor used for Claude tool calls."""
+    return FunctionExecutor(
+        slo_calculator=get_slo_calculator(),
+        degradation_detector=get_degradation_detector(),
+        trend_analyzer=get_trend_analyzer(),
+        metrics_aggregator=get_metrics_aggregator()
+    )
+
+
+@st.cache_resource
+def get_claude_client():
+    """Create the Claude client."""
+    logger.info("Initializing Claude client")
+    return ClaudeClient()
+
+
+@st.cache_resource
+def get_opensearch_client():
+    """Create the OpenSearch client (keeps its connection pool across refreshes)."""
+    # Imported here so opensearchpy only loads once a refresh is requested
+    from data.ingestion.opensearch_client import OpenSearchClient
+    return OpenSearchClient()
+
+
+@st.cache_resource
+def get_data_loader():
+    """Create the data loader."""
+    return DataLoader(get_db_manager())
+
+
+class Components:
+    """Lazy accessors for the cached system components."""
+
+    @property
+    def db_manager(self) -> DuckDBManager:
+        return get_db_manager()
+
+    @property
+    def slo_calculator(self) -> SLOCalculator:
+        return get_slo_calculator()
+
+    @property
+    def degradation_detector(self) -> DegradationDetector:
+        return get_degradation_detector()
+
+    @property
+    def trend_analyzer(self) -> TrendAnalyzer:
+        return get_trend_analyzer()
+
+    @property
+    def metrics_aggregator(self) -> MetricsAggregator:
+        return get_metrics_aggregator()
+
+    @property
+    def function_executor(self) -> FunctionExecutor:
+        return get_function_executor()
+
+    @property
+    def claude_client(self) -> ClaudeClient:
+        return get_claude_client()
+
+    @property
+    def data_loader(self) -> DataLoader:
+        return get_data_loader()
+
+
+# JSON file loading removed - data now only comes from OpenSearch
+# def load_initial_data(data_loader):
+#     """Load initial data from JSON files."""
+#     service_logs_path = PROJECT_ROOT / "ServiceLogs7Amto11Am31Dec2025.json"
+#     error_logs_path = PROJECT_ROOT / "ErrorLogs7Amto11Am31Dec2025.json"
+#
+#     if service_logs_path.exists() and error_logs_path.exists():
+#         with st.spinner("Loading service and error logs..."):
+#             data_loader.load_and_store_all(str(service_logs_path), str(error_logs_path))
+#         st.success("Data loaded successfully!")
+#         return True
+#     else:
+#         st.error("Log files not found!")
+#         return False
+
+
+# Dashboard aggregates are keyed on the data's (min_time, max_time), so reruns
+# over unchanged data skip the DuckDB scans
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL_SECONDS)
+def load_dashboard_snapshot(range_key):
+    """Get health overview, top 5 services and top 5 SLO violations for the loaded data.
+
+    Display strings are formatted here too, so reruns only emit widgets.
+    """
+    snapshot = get_metrics_aggregator().get_dashboard_snapshot(top_limit=5, violation_limit=5)
+
+    health_overview = snapshot['health_overview']
+    total_req = health_overview.get('total_requests', 0)
+    error_rate = health_overview.get('overall_error_rate', 0)
+    snapshot['labels'] = {
+        'health_percentage': f"{health_overview['health_percentage']:.1f}%",
+        'total_requests': f"{total_req:,}" if total_req else "0",
+        'overall_error_rate': f"{error_rate:.2f}%" if error_rate else "0.00%"
+    }
+
+    # One markdown block per violation instead of a write call per line
+    for violation in snapshot['violations']:
+        reasons = "\n".join(f"- {reason}" for reason in violation['violations'])
+        violation['details'] = (
+            f"**Error Rate:** {violation['error_rate']:.2f}%\n\n"
+            f"**Response Time:** {violation['response_time']:.3f}s\n\n"
+            f"**Violations:**\n\n{reasons}"
+        )
+
+    return snapshot
+
+
+@st.cache_data(ttl=DASHBOARD_CACHE_TTL_SECONDS)
+def build_top_services_figure(range_key):
+    """Build the top 5 services bar chart, or None if there is no data."""
+    top_services = load_dashboard_snapshot(range_key)['top_services']
+    if not top_services:
+        return None
+
+    # Imported here so sessions that never render the chart skip loading plotly
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Bar(
+        x=[service['service_name'] for service in top_services],
+        y=[service['total_requests'] for service in top_services]
+    ))
+    fig.update_layout(
+        title='Top 5 Services by Request Volume',
+        xaxis_title='Service',
+        yaxis_title='Total Requests',
+        xaxis_tickangle=-45
+    )
+    return fig
+
+
+def clear_dashboard_cache():
+    """Drop cached dashboard aggregates after new data is loaded."""
+    load_dashboard_snapshot.clear()
+    build_top_services_figure.clear()
+
+
+def display_dashboard(components):
+    """Display dashboard with key metrics."""
+    st.markdown("<h2>Service Health Dashboard</h2>", unsafe_allow_html=True)
+
+    time_range = components.db_manager.get_time_range()
+    range_key = (time_range['min_time'], time_range['max_time'])
+
+    # Overview, top services and violations come from one aggregation
+    snapshot = load_dashboard_snapshot(range_key)
+    health_overview = snapshot['health_overview']
+    labels = snapshot['labels']
+
+    # Display metrics in columns
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric(
+            "Total Services",
+            health_overview['total_services'],
+            help="Total number of services"
+        )
+
+    with col2:
+        st.metric(
+            "Healthy Services",
+            health_overview['healthy_services'],
+            labels['health_percentage'],
+            help="Services meeting SLO targets"
+        )
+
+    with col3:
+        st.metric(
+            "Degraded Services",
+            health_overview['degraded_services'],
+            help="Services approaching SLO limits"
+        )
+
+    with col4:
+        st.metric(
+            "Violated Services",
+            health_overview['violated_services'],
+            help="Services violating SLO"
+        )
+
+    # Overall metrics
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.metric(
+            "Total Requests",
+            labels['total_requests'],
+            help="Total request count"
+        )
+
+    with col2:
+        st.metric(
+            "Overall Error Rate",
+            labels['overall_error_rate'],
+            help="System-wide error rate"
+        )
+
+    # Top services by volume
+    st.markdown("<h3>Top Services by Volume</h3>", unsafe_allow_html=True)
+    top_services_fig = build_top_services_figure(range_key)
+
+    if top_services_fig is not None:
+        st.plotly_chart(top_services_fig, use_container_width=True)
+
+    # SLO violations
+    violations = snapshot['violations']
+    if violations:
+        st.markdown("<h3>⚠️ Current SLO Violations</h3>", unsafe_allow_html=True)
+        for violation in violations:
+            with st.expander(f"🔴 {violation['service_name']}"):
+                st.markdown(violation['details'])
+
+
+def display_chat(components):
+    """Display chat interface."""
+    st.markdown("<h2>💬 SLO Assistant</h2>", unsafe_allow_html=True)
+
+    # Initialize chat history
+    if 'messages' not in st.session_state:
+        st.session_state.messages = []
+
+    # Display chat history
+    for message in st.session_state.messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
     # Chat input
     if prompt := st.chat_input("Ask about service health, SLOs, or degradation..."):
         # Add user message
@@ -403,24 +518,23 @@ BAD: "Service looks fine, average latency is stable" (WRONG - ignores percentile
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Get Claude response
+        # Stream Claude's response into the chat as it is generated
         with st.chat_message("assistant"):
-            with st.spinner("Analyzing..."):
-                try:
-                    response = components['claude_client'].chat(
-                        user_message=prompt,
-                        tools=TOOLS,
-                        tool_executor=components['function_executor'],
-                        system_prompt=system_prompt
-                    )
+            try:
+                response = st.write_stream(components.claude_client.chat_stream(
+                    user_message=prompt,
+                    tools=TOOLS,
+                    tool_executor=components.function_executor,
+                    system_prompt=SYSTEM_PROMPT,
+                    max_history_turns=st.session_state.get("chat_history_turns", CHAT_HISTORY_MAX_TURNS)
+                ))
 
-                    st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
+                st.session_state.messages.append({"role": "assistant", "content": response})
 
-                except Exception as e:
-                    error_msg = f"Error: {str(e)}"
-                    st.error(error_msg)
-                    logger.error(f"Chat error: {e}")
+            except Exception as e:
+                error_msg = f"Error: {str(e)}"
+                st.error(error_msg)
+                logger.error(f"Chat error: {e}")
 
 
 def main():
@@ -429,8 +543,8 @@ def main():
     st.markdown("<div class='main-header'>📊 SLO Chatbot</div>", unsafe_allow_html=True)
     st.markdown("**AI-powered Service Level Objective monitoring and analysis**")
 
-    # Initialize system
-    components = initialize_system()
+    # System components (created lazily on first use)
+    components = Components()
 
     # Sidebar
     with st.sidebar:
@@ -445,7 +559,7 @@ def main():
         # Time range selection
         time_range_option = st.selectbox(
             "Time Range",
-            ["Last 4 hours", "Custom"],
+            [*TIME_RANGE_OPTIONS, "Custom"],
             index=0
         )
 
@@ -463,23 +577,22 @@ def main():
         max_results = st.number_input(
             "Max Results",
             min_value=100,
-            max_value=10000,
+            max_value=100000,
             value=1000,
             step=100,
-            help="Maximum results to fetch from OpenSearch"
+            help="Maximum results to fetch per index from OpenSearch (above 10,000 the scroll API pages through results)"
         )
 
         if st.button("🔄 Refresh from OpenSearch"):
             with st.spinner("Fetching logs from OpenSearch..."):
                 try:
-                    os_client = OpenSearchClient()
+                    os_client = get_opensearch_client()
 
                     # Calculate time range
-                    from datetime import datetime, timedelta
                     end_time_dt = datetime.now()
 
-                    if time_range_option == "Last 4 hours":
-                        start_time_dt = end_time_dt - timedelta(hours=4)
+                    if time_range_option in TIME_RANGE_OPTIONS:
+                        start_time_dt = end_time_dt - TIME_RANGE_OPTIONS[time_range_option]
                     else:  # Custom
                         start_time_dt = datetime.combine(start_date, start_time)
                         end_time_dt = datetime.combine(end_date, end_time)
@@ -495,45 +608,29 @@ def main():
 
                     st.info(f"Fetching data from {start_time_dt} to {end_time_dt}")
 
-                    # Fetch logs without scroll API
-                    service_logs = os_client.query_service_logs(
-                        start_time=start_time_dt,
-                        end_time=end_time_dt,
-                        size=max_results,
-                        use_scroll=False
-                    )
-
-                    error_logs = os_client.query_error_logs(
-                        start_time=start_time_dt,
-                        end_time=end_time_dt,
-                        size=max_results,
-                        use_scroll=False
-                    )
-
-                    # Load into database
-                    import tempfile
-                    import os
-                    import json
-
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='_service.json', delete=False) as f:
-                        json.dump(service_logs, f)
-                        service_temp_path = f.name
-
-                    with tempfile.NamedTemporaryFile(mode='w', suffix='_error.json', delete=False) as f:
-                        json.dump(error_logs, f)
-                        error_temp_path = f.name
-
-                    try:
-                        components['data_loader'].load_and_store_all(service_temp_path, error_temp_path)
+                    if max_results > MAX_RESULT_WINDOW:
+                        # Beyond the result window: stream scroll batches
+                        # straight into the database
+                        service_count, error_count = components.data_loader.load_and_store_all_from_batches(
+                            os_client.iter_service_log_batches(start_time_dt, end_time_dt, max_hits=max_results),
+                            os_client.iter_error_log_batches(start_time_dt, end_time_dt, max_hits=max_results)
+                        )
+                    else:
+                        # Fetch both indices in one multi-search request
+                        service_logs, error_logs = os_client.query_all_logs(
+                            start_time=start_time_dt,
+                            end_time=end_time_dt,
+                            size=max_results
+                        )
+                        components.data_loader.load_and_store_all_from_responses(service_logs, error_logs)
                         service_count = len(service_logs.get('hits', {}).get('hits', []))
                         error_count = len(error_logs.get('hits', {}).get('hits', []))
-                        st.success(f"✅ Loaded {service_count:,} service logs and {error_count:,} error logs")
-                    finally:
-                        os.unlink(service_temp_path)
-                        os.unlink(error_temp_path)
+
+                    components.function_executor.clear_cache()
+                    clear_dashboard_cache()
+                    st.success(f"✅ Loaded {service_count:,} service logs and {error_count:,} error logs")
 
                 except Exception as e:
-                    import traceback
                     error_details = traceback.format_exc()
                     st.error(f"Failed to fetch from OpenSearch: {str(e)}")
                     with st.expander("View Error Details"):
@@ -542,22 +639,31 @@ def main():
 
         # Data info
         try:
-            time_range = components['db_manager'].get_time_range()
+            time_range = components.db_manager.get_time_range()
             if time_range['min_time'] and time_range['max_time']:
                 st.markdown("### 📅 Data Time Range")
                 st.write(f"**From:** {time_range['min_time']}")
                 st.write(f"**To:** {time_range['max_time']}")
 
-            all_services = components['db_manager'].get_all_services()
-            st.markdown(f"### 📊 Total Services: {len(all_services)}")
+            st.markdown(f"### 📊 Total Services: {components.db_manager.count_services()}")
 
         except Exception as e:
             st.warning("No data loaded yet. Please load data first.")
 
+        # Chat memory: recent turns sent verbatim; older ones are summarized
+        st.slider(
+            "Chat Memory (turns)",
+            min_value=1,
+            max_value=CHAT_HISTORY_MAX_TURNS,
+            value=CHAT_HISTORY_MAX_TURNS,
+            key="chat_history_turns",
+            help="Recent conversation turns sent to Claude as-is; older turns are summarized"
+        )
+
         # Clear chat
         if st.button("🗑️ Clear Chat History"):
             st.session_state.messages = []
-            components['claude_client'].clear_history()
+            components.claude_client.clear_history()
             st.success("Chat history cleared!")
 
         # Sample questions
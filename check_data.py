@@ -9,11 +9,27 @@ print("\n" + "="*60)
 print("DATABASE INSPECTION")
 print("="*60)
 
+# Scalar stats for both tables in one round trip
+stats_sql = """
+WITH svc AS (
+    SELECT
+        COUNT(*) as total,
+        COUNT(*) FILTER (WHERE service_name IS NULL OR service_name = '') as null_count,
+        MIN(record_time) as min_time,
+        MAX(record_time) as max_time
+    FROM service_logs
+),
+err AS (
+    SELECT COUNT(*) as total FROM error_logs
+)
+SELECT svc.total, svc.null_count, err.total, svc.min_time, svc.max_time
+FROM svc, err
+"""
+service_total, null_count, error_total, min_time, max_time = db.query_one(stats_sql)
+
 # Check service logs
 print("\n1. SERVICE LOGS:")
-service_count_sql = "SELECT COUNT(*) as total FROM service_logs"
-result = db.query(service_count_sql)
-print(f"   Total service log records: {result['total'].iloc[0]}")
+print(f"   Total service log records: {service_total}")
 
 # Check unique service names
 unique_services_sql = """
@@ -25,27 +41,19 @@ GROUP BY service_name
 ORDER BY count DESC
 LIMIT 20
 """
-result = db.query(unique_services_sql)
-print(f"\n   Unique service names found: {len(result)}")
+rows = db.query_rows(unique_services_sql)
+print(f"\n   Unique service names found: {len(rows)}")
 print("\n   Top 20 services by record count:")
-for idx, row in result.iterrows():
-    service_name = row['service_name'] if row['service_name'] else '<NULL/None>'
-    print(f"   {idx+1}. {service_name}: {row['count']} records")
+for idx, (service_name, count) in enumerate(rows):
+    service_name = service_name if service_name else '<NULL/None>'
+    print(f"   {idx+1}. {service_name}: {count} records")
 
 # Check for NULL service names
-null_count_sql = """
-SELECT COUNT(*) as null_count
-FROM service_logs
-WHERE service_name IS NULL OR service_name = ''
-"""
-result = db.query(null_count_sql)
-print(f"\n   Records with NULL/empty service_name: {result['null_count'].iloc[0]}")
+print(f"\n   Records with NULL/empty service_name: {null_count}")
 
 # Check error logs
 print("\n2. ERROR LOGS:")
-error_count_sql = "SELECT COUNT(*) as total FROM error_logs"
-result = db.query(error_count_sql)
-print(f"   Total error log records: {result['total'].iloc[0]}")
+print(f"   Total error log records: {error_total}")
 
 # Check sample service log data
 print("\n3. SAMPLE SERVICE LOG DATA:")
@@ -64,9 +72,8 @@ for idx, row in result.iterrows():
 
 # Check time range
 print("\n4. TIME RANGE:")
-time_range = db.get_time_range()
-print(f"   Min time: {time_range['min_time']}")
-print(f"   Max time: {time_range['max_time']}")
+print(f"   Min time: {min_time}")
+print(f"   Max time: {max_time}")
 
 print("\n" + "="*60)
 print("INSPECTION COMPLETE")
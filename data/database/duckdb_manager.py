@@ -1,15 +1,90 @@
 """DuckDB manager for storing and querying SLO data."""
 
+import itertools
+import threading
+import time
+from contextlib import contextmanager
 import duckdb
 import pandas as pd
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from datetime import datetime, timedelta
 from utils.logger import setup_logger
-from utils.config import DUCKDB_PATH
+from utils.config import DUCKDB_PATH, DUCKDB_THREADS, DUCKDB_MEMORY_LIMIT, DUCKDB_TEMP_DIRECTORY
 
 logger = setup_logger(__name__)
 
+# get_time_range() / get_all_services() are called by most analytics
+# functions; reuse their results briefly
+METADATA_CACHE_TTL_SECONDS = 10
+
+# Rows a load keeps: an id and a record_time that parses as epoch milliseconds
+VALID_ROW_FILTER = "id IS NOT NULL AND TRY_CAST(record_time AS BIGINT) IS NOT NULL"
+
+# Table schemas, shared by _create_tables() and the full reload in
+# insert_*_logs(replace=True)
+SERVICE_LOGS_COLUMNS_DDL = """(
+    id VARCHAR PRIMARY KEY,
+    app_id INTEGER,
+    sid INTEGER,
+    service_name VARCHAR,
+    record_time TIMESTAMP,
+    total_count INTEGER,
+    success_count INTEGER,
+    error_count INTEGER,
+    na_error_count INTEGER,
+    success_rate DOUBLE,
+    error_rate DOUBLE,
+    response_time_avg DOUBLE,
+    response_time_min DOUBLE,
+    response_time_max DOUBLE,
+    response_time_p25 DOUBLE,
+    response_time_p50 DOUBLE,
+    response_time_p75 DOUBLE,
+    response_time_p80 DOUBLE,
+    response_time_p85 DOUBLE,
+    response_time_p90 DOUBLE,
+    response_time_p95 DOUBLE,
+    response_time_p99 DOUBLE,
+    target_error_slo_perc DOUBLE,
+    target_response_slo_sec DOUBLE,
+    response_target_percent DOUBLE
+)
+"""
+ERROR_LOGS_COLUMNS_DDL = """(
+    id VARCHAR PRIMARY KEY,
+    wm_application_id INTEGER,
+    wm_application_name VARCHAR,
+    wm_transaction_id INTEGER,
+    wm_transaction_name VARCHAR,
+    error_codes VARCHAR,
+    error_count INTEGER,
+    total_count INTEGER,
+    technical_error_count INTEGER,
+    business_error_count INTEGER,
+    response_time_avg DOUBLE,
+    response_time_min DOUBLE,
+    response_time_max DOUBLE,
+    error_details VARCHAR,
+    record_time TIMESTAMP
+)
+"""
+
+# Secondary indexes per table; built after a reload's bulk insert.
+# DuckDB only uses single-column ART indexes for filters, so composite
+# indexes are not created. error_codes has no index: its few distinct values
+# made the ART build take seconds per load for a millisecond lookup gain.
+SERVICE_LOGS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_service_time ON service_logs(record_time)",
+    "CREATE INDEX IF NOT EXISTS idx_service_name ON service_logs(service_name)"
+]
+ERROR_LOGS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_error_time ON error_logs(record_time)"
+]
+
+# Indexes created by earlier versions, dropped from existing database files
+OBSOLETE_INDEXES = ['idx_service_name_time', 'idx_error_codes', 'idx_error_transaction_time']
+
 
 class DuckDBManager:
     """Manager for DuckDB operations."""
@@ -22,196 +97,293 @@ class DuckDBManager:
         """
         self.db_path = db_path or DUCKDB_PATH
         self.conn = None
+        self._local = threading.local()
+        self._write_lock = threading.Lock()  # one load transaction at a time
+        self._time_range_cache = None  # (expires_at, time_range)
+        self._services_cache = None  # (expires_at, service_names)
+        self._service_count_cache = None  # (expires_at, service_count)
+        # Changes on every insert and committed load, so callers can key
+        # caches on the data they were computed from
+        self._version_counter = itertools.count(1)
+        self.data_version = 0
         self._connect()
         self._create_tables()
 
     def _connect(self):
         """Establish connection to DuckDB."""
         try:
-            self.conn = duckdb.connect(str(self.db_path))
+            config = {}
+            if DUCKDB_THREADS:
+                config['threads'] = DUCKDB_THREADS
+            if DUCKDB_MEMORY_LIMIT:
+                config['memory_limit'] = DUCKDB_MEMORY_LIMIT
+            if DUCKDB_TEMP_DIRECTORY:
+                config['temp_directory'] = DUCKDB_TEMP_DIRECTORY
+            self.conn = duckdb.connect(str(self.db_path), config=config)
             logger.info(f"Connected to DuckDB at {self.db_path}")
         except Exception as e:
             logger.error(f"Failed to connect to DuckDB: {e}")
             raise
 
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        """Get a cursor for the calling thread.
+
+        A single DuckDB connection must not be used from several threads at
+        once, so each thread (e.g. parallel tool calls) gets its own cursor
+        on the same database. Cursors are released together with their thread.
+
+        Returns:
+            Thread-local DuckDB cursor
+        """
+        if threading.current_thread() is threading.main_thread():
+            return self.conn
+
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self.conn.cursor()
+            self._local.cursor = cursor
+        return cursor
+
     def _create_tables(self):
         """Create tables for service and error logs."""
-        # Service logs table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS service_logs (
-                id VARCHAR PRIMARY KEY,
-                app_id INTEGER,
-                sid INTEGER,
-                service_name VARCHAR,
-                record_time TIMESTAMP,
-                total_count INTEGER,
-                success_count INTEGER,
-                error_count INTEGER,
-                na_error_count INTEGER,
-                success_rate DOUBLE,
-                error_rate DOUBLE,
-                response_time_avg DOUBLE,
-                response_time_min DOUBLE,
-                response_time_max DOUBLE,
-                response_time_p25 DOUBLE,
-                response_time_p50 DOUBLE,
-                response_time_p75 DOUBLE,
-                response_time_p80 DOUBLE,
-                response_time_p85 DOUBLE,
-                response_time_p90 DOUBLE,
-                response_time_p95 DOUBLE,
-                response_time_p99 DOUBLE,
-                target_error_slo_perc DOUBLE,
-                target_response_slo_sec DOUBLE,
-                response_target_percent DOUBLE
-            )
-        """)
-
-        # Error logs table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS error_logs (
-                id VARCHAR PRIMARY KEY,
-                wm_application_id INTEGER,
-                wm_application_name VARCHAR,
-                wm_transaction_id INTEGER,
-                wm_transaction_name VARCHAR,
-                error_codes VARCHAR,
-                error_count INTEGER,
-                total_count INTEGER,
-                technical_error_count INTEGER,
-                business_error_count INTEGER,
-                response_time_avg DOUBLE,
-                response_time_min DOUBLE,
-                response_time_max DOUBLE,
-                error_details VARCHAR,
-                record_time TIMESTAMP
-            )
-        """)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS service_logs {SERVICE_LOGS_COLUMNS_DDL}")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS error_logs {ERROR_LOGS_COLUMNS_DDL}")
 
         # Create indexes for faster queries
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_service_time ON service_logs(record_time)")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_service_name ON service_logs(service_name)")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_error_time ON error_logs(record_time)")
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_error_codes ON error_logs(error_codes)")
+        for statement in SERVICE_LOGS_INDEXES + ERROR_LOGS_INDEXES:
+            self.conn.execute(statement)
+        for index_name in OBSOLETE_INDEXES:
+            self.conn.execute(f"DROP INDEX IF EXISTS {index_name}")
 
         logger.info("Database tables created/verified")
 
-    def insert_service_logs(self, df: pd.DataFrame):
+    def insert_service_logs(self, df: pd.DataFrame, replace: bool = True) -> int:
         """Insert service logs into the database.
 
         Args:
             df: DataFrame with service log data
+            replace: Replace all existing service logs (False appends, e.g.
+                for later batches of a streamed load)
+
+        Returns:
+            Number of rows inserted (0 if nothing was stored)
         """
         try:
             if df.empty:
                 logger.warning("Empty DataFrame provided, skipping insert")
-                return
-
-            # Convert to proper format
-            df = df.copy()
+                return 0
 
-            # Handle timestamp conversion with error handling
-            try:
-                df['record_time'] = pd.to_datetime(df['record_time'], unit='ms', errors='coerce')
-            except Exception as e:
-                logger.warning(f"Some timestamps could not be converted: {e}")
-                df['record_time'] = pd.to_datetime(df['record_time'], unit='ms', errors='coerce')
-
-            # Drop rows with invalid timestamps
-            invalid_rows = df['record_time'].isna().sum()
-            if invalid_rows > 0:
-                logger.warning(f"Dropping {invalid_rows} rows with invalid timestamps")
-                df = df.dropna(subset=['record_time'])
-
-            # Ensure id is not null
-            df = df.dropna(subset=['id'])
+            self.conn.register('temp_service_df', df)
 
-            if df.empty:
+            # Rows without an id or an epoch-ms record_time are dropped in the
+            # INSERT below; bail out before touching the table if none would
+            # survive, so an all-invalid load leaves the existing data in place
+            valid = self.conn.execute(f"SELECT COUNT(*) FROM temp_service_df WHERE {VALID_ROW_FILTER}").fetchone()[0]
+            if not valid:
+                self.conn.unregister('temp_service_df')
                 logger.error("All rows were invalid after cleaning")
-                return
+                return 0
+
+            # A full reload rebuilds the table rather than deleting rows, so
+            # storage is written contiguously and nothing is left to vacuum
+            if replace:
+                self.conn.execute(f"CREATE OR REPLACE TABLE service_logs {SERVICE_LOGS_COLUMNS_DDL}")
+
+            # The DataFrame is registered as-is and cleaned in SQL: epoch ms become
+            # TIMESTAMPs and invalid rows are filtered inside DuckDB, avoiding a
+            # pandas copy (and DuckDB 0.10's index errors when scanning a
+            # filtered frame). Rows are stored in time order so row-group
+            # min/max stats on record_time can skip data outside a query's window.
+            inserted = self.conn.execute(f"""
+                INSERT INTO service_logs
+                SELECT * REPLACE (epoch_ms(TRY_CAST(record_time AS BIGINT)) AS record_time)
+                FROM temp_service_df
+                WHERE {VALID_ROW_FILTER}
+                ORDER BY record_time
+            """).fetchone()[0]
+            self.conn.unregister('temp_service_df')
 
-            # Reset index to avoid DuckDB index out of bounds errors
-            df = df.reset_index(drop=True)
+            if inserted < len(df):
+                logger.warning(f"Dropped {len(df) - inserted} rows with a missing id or invalid timestamp")
 
-            # Clear existing data and insert fresh
-            self.conn.execute("DELETE FROM service_logs")
+            # Indexes are built once over the loaded rows (no-op when appending)
+            if replace:
+                for statement in SERVICE_LOGS_INDEXES:
+                    self.conn.execute(statement)
 
-            # Register DataFrame explicitly with DuckDB to avoid index issues
-            self.conn.register('temp_service_df', df)
-            self.conn.execute("INSERT INTO service_logs SELECT * FROM temp_service_df")
-            self.conn.unregister('temp_service_df')
+            # New data means a new time range and service list
+            self._time_range_cache = None
+            self._services_cache = None
+            self._service_count_cache = None
 
-            logger.info(f"Inserted {len(df)} service log records")
+            self._bump_data_version()
+            logger.info(f"Inserted {inserted} service log records")
+            return inserted
         except Exception as e:
             logger.error(f"Failed to insert service logs: {e}", exc_info=True)
             raise
 
-    def insert_error_logs(self, df: pd.DataFrame):
+    def insert_error_logs(self, df: pd.DataFrame, replace: bool = True) -> int:
         """Insert error logs into the database.
 
         Args:
             df: DataFrame with error log data
+            replace: Replace all existing error logs (False appends, e.g.
+                for later batches of a streamed load)
+
+        Returns:
+            Number of rows inserted (0 if nothing was stored)
         """
         try:
             if df.empty:
                 logger.warning("Empty DataFrame provided, skipping insert")
-                return
-
-            # Convert to proper format
-            df = df.copy()
-
-            # Handle timestamp conversion with error handling
-            try:
-                df['record_time'] = pd.to_datetime(df['record_time'], unit='ms', errors='coerce')
-            except Exception as e:
-                logger.warning(f"Some timestamps could not be converted: {e}")
-                df['record_time'] = pd.to_datetime(df['record_time'], unit='ms', errors='coerce')
-
-            # Drop rows with invalid timestamps
-            invalid_rows = df['record_time'].isna().sum()
-            if invalid_rows > 0:
-                logger.warning(f"Dropping {invalid_rows} rows with invalid timestamps")
-                df = df.dropna(subset=['record_time'])
+                return 0
 
-            # Ensure id is not null
-            df = df.dropna(subset=['id'])
+            self.conn.register('temp_error_df', df)
 
-            if df.empty:
+            # Rows without an id or an epoch-ms record_time are dropped in the
+            # INSERT below; bail out before touching the table if none would
+            # survive, so an all-invalid load leaves the existing data in place
+            valid = self.conn.execute(f"SELECT COUNT(*) FROM temp_error_df WHERE {VALID_ROW_FILTER}").fetchone()[0]
+            if not valid:
+                self.conn.unregister('temp_error_df')
                 logger.error("All rows were invalid after cleaning")
-                return
+                return 0
+
+            # A full reload rebuilds the table rather than deleting rows, so
+            # storage is written contiguously and nothing is left to vacuum
+            if replace:
+                self.conn.execute(f"CREATE OR REPLACE TABLE error_logs {ERROR_LOGS_COLUMNS_DDL}")
+
+            # Cleaned and stored in time order inside DuckDB, as for service logs
+            inserted = self.conn.execute(f"""
+                INSERT INTO error_logs
+                SELECT * REPLACE (epoch_ms(TRY_CAST(record_time AS BIGINT)) AS record_time)
+                FROM temp_error_df
+                WHERE {VALID_ROW_FILTER}
+                ORDER BY record_time
+            """).fetchone()[0]
+            self.conn.unregister('temp_error_df')
 
-            # Reset index to avoid DuckDB index out of bounds errors
-            df = df.reset_index(drop=True)
+            if inserted < len(df):
+                logger.warning(f"Dropped {len(df) - inserted} rows with a missing id or invalid timestamp")
 
-            # Clear existing data and insert fresh
-            self.conn.execute("DELETE FROM error_logs")
+            # Indexes are built once over the loaded rows (no-op when appending)
+            if replace:
+                for statement in ERROR_LOGS_INDEXES:
+                    self.conn.execute(statement)
 
-            # Register DataFrame explicitly with DuckDB to avoid index issues
-            self.conn.register('temp_error_df', df)
-            self.conn.execute("INSERT INTO error_logs SELECT * FROM temp_error_df")
-            self.conn.unregister('temp_error_df')
-
-            logger.info(f"Inserted {len(df)} error log records")
+            self._bump_data_version()
+            logger.info(f"Inserted {inserted} error log records")
+            return inserted
         except Exception as e:
             logger.error(f"Failed to insert error logs: {e}", exc_info=True)
             raise
 
-    def query(self, sql: str) -> pd.DataFrame:
+    @contextmanager
+    def transaction(self):
+        """Run a load's inserts as one transaction, rolled back on failure.
+
+        Readers on other threads keep seeing the previous data until commit,
+        and a failed load leaves it untouched. Concurrent loads wait for each
+        other.
+        """
+        with self._write_lock:
+            self.conn.begin()
+            try:
+                yield
+            except Exception:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+
+            # Lookups cached by other threads mid-transaction saw the old data
+            self._time_range_cache = None
+            self._services_cache = None
+            self._service_count_cache = None
+            self._bump_data_version()
+
+    def _bump_data_version(self):
+        """Move data_version on to a new value (next() on a count is atomic)."""
+        self.data_version = next(self._version_counter)
+
+    def query(self, sql: str, params: Optional[Union[List[Any], Dict[str, Any]]] = None) -> pd.DataFrame:
         """Execute a SQL query and return results as DataFrame.
 
         Args:
-            sql: SQL query string
+            sql: SQL query string, optionally with ``?`` or ``$name`` placeholders
+            params: Values bound to the placeholders (list, or dict for named ones)
 
         Returns:
             Query results as DataFrame
         """
         try:
-            result = self.conn.execute(sql).fetchdf()
+            result = self._cursor().execute(sql, params).fetchdf()
             return result
         except Exception as e:
             logger.error(f"Query failed: {e}\nSQL: {sql}")
             raise
 
+    def query_rows(self, sql: str, params: Optional[Union[List[Any], Dict[str, Any]]] = None) -> List[tuple]:
+        """Execute a SQL query and return the raw result rows.
+
+        Skips the DataFrame conversion for callers that only turn rows into
+        dicts. NULLs come back as None.
+
+        Args:
+            sql: SQL query string, optionally with ``?`` or ``$name`` placeholders
+            params: Values bound to the placeholders (list, or dict for named ones)
+
+        Returns:
+            List of row tuples in SELECT column order
+        """
+        try:
+            return self._cursor().execute(sql, params).fetchall()
+        except Exception as e:
+            logger.error(f"Query failed: {e}\nSQL: {sql}")
+            raise
+
+    def query_one(self, sql: str, params: Optional[Union[List[Any], Dict[str, Any]]] = None) -> Optional[tuple]:
+        """Execute a SQL query and return its first row.
+
+        For aggregates that produce a single row of scalars. NULLs come
+        back as None.
+
+        Args:
+            sql: SQL query string, optionally with ``?`` or ``$name`` placeholders
+            params: Values bound to the placeholders (list, or dict for named ones)
+
+        Returns:
+            First row tuple, or None if the query returned no rows
+        """
+        try:
+            return self._cursor().execute(sql, params).fetchone()
+        except Exception as e:
+            logger.error(f"Query failed: {e}\nSQL: {sql}")
+            raise
+
+    def query_record(self, sql: str, params: Optional[Union[List[Any], Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """Execute a SQL query and return its first row as a dict.
+
+        Args:
+            sql: SQL query string, optionally with ``?`` or ``$name`` placeholders
+            params: Values bound to the placeholders (list, or dict for named ones)
+
+        Returns:
+            Column name to value mapping for the first row, or None if the
+            query returned no rows
+        """
+        try:
+            cursor = self._cursor().execute(sql, params)
+            row = cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Query failed: {e}\nSQL: {sql}")
+            raise
+
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
     def get_service_logs(self,
                         service_name: Optional[str] = None,
                         start_time: Optional[datetime] = None,
@@ -228,17 +400,26 @@ class DuckDBManager:
         Returns:
             Filtered service logs
         """
+        # Filter values are bound, not interpolated, so names containing
+        # quotes are safe
         where_clauses = []
+        params = []
 
         if service_name:
-            where_clauses.append(f"service_name = '{service_name}'")
+            where_clauses.append("service_name = ?")
+            params.append(service_name)
         if start_time:
-            where_clauses.append(f"record_time >= '{start_time}'")
+            where_clauses.append("record_time >= ?")
+            params.append(start_time)
         if end_time:
-            where_clauses.append(f"record_time <= '{end_time}'")
+            where_clauses.append("record_time <= ?")
+            params.append(end_time)
 
         where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-        limit_sql = f"LIMIT {limit}" if limit else ""
+        limit_sql = ""
+        if limit:
+            limit_sql = "LIMIT ?"
+            params.append(limit)
 
         sql = f"""
             SELECT * FROM service_logs
@@ -247,7 +428,7 @@ class DuckDBManager:
             {limit_sql}
         """
 
-        return self.query(sql)
+        return self.query(sql, params)
 
     def get_error_logs(self,
                       error_code: Optional[str] = None,
@@ -265,17 +446,26 @@ class DuckDBManager:
         Returns:
             Filtered error logs
         """
+        # Filter values are bound, not interpolated, so names containing
+        # quotes are safe
         where_clauses = []
+        params = []
 
         if error_code:
-            where_clauses.append(f"error_codes = '{error_code}'")
+            where_clauses.append("error_codes = ?")
+            params.append(error_code)
         if start_time:
-            where_clauses.append(f"record_time >= '{start_time}'")
+            where_clauses.append("record_time >= ?")
+            params.append(start_time)
         if end_time:
-            where_clauses.append(f"record_time <= '{end_time}'")
+            where_clauses.append("record_time <= ?")
+            params.append(end_time)
 
         where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-        limit_sql = f"LIMIT {limit}" if limit else ""
+        limit_sql = ""
+        if limit:
+            limit_sql = "LIMIT ?"
+            params.append(limit)
 
         sql = f"""
             SELECT * FROM error_logs
@@ -284,35 +474,70 @@ class DuckDBManager:
             {limit_sql}
         """
 
-        return self.query(sql)
+        return self.query(sql, params)
 
     def get_all_services(self) -> List[str]:
         """Get list of all unique service names.
 
+        The result is cached for METADATA_CACHE_TTL_SECONDS and reset
+        whenever service logs are inserted.
+
         Returns:
-            List of service names
+            Sorted list of service names (NULL names excluded)
         """
-        sql = "SELECT DISTINCT service_name FROM service_logs ORDER BY service_name"
-        result = self.query(sql)
-        return result['service_name'].tolist()
+        cached = self._services_cache
+        if cached is not None and cached[0] > time.monotonic():
+            return list(cached[1])
+
+        # Sorted in Python: the distinct list is small, so the plan needs no sort
+        sql = "SELECT DISTINCT service_name FROM service_logs WHERE service_name IS NOT NULL"
+        services = sorted(row[0] for row in self.query_rows(sql))
+        self._services_cache = (time.monotonic() + METADATA_CACHE_TTL_SECONDS, services)
+        return list(services)
+
+    def count_services(self) -> int:
+        """Count unique service names without fetching them.
+
+        The result is cached for METADATA_CACHE_TTL_SECONDS and reset
+        whenever service logs are inserted.
+
+        Returns:
+            Number of distinct services
+        """
+        cached = self._service_count_cache
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        count = self.query_one("SELECT COUNT(DISTINCT service_name) FROM service_logs")[0]
+        self._service_count_cache = (time.monotonic() + METADATA_CACHE_TTL_SECONDS, count)
+        return count
 
     def get_time_range(self) -> Dict[str, datetime]:
         """Get the time range of data in the database.
 
+        The result is cached for METADATA_CACHE_TTL_SECONDS and reset
+        whenever service logs are inserted.
+
         Returns:
             Dictionary with min_time and max_time
         """
+        cached = self._time_range_cache
+        if cached is not None and cached[0] > time.monotonic():
+            return dict(cached[1])
+
         sql = """
             SELECT
                 MIN(record_time) as min_time,
                 MAX(record_time) as max_time
             FROM service_logs
         """
-        result = self.query(sql)
-        return {
-            'min_time': result['min_time'].iloc[0],
-            'max_time': result['max_time'].iloc[0]
+        min_time, max_time = self.query_one(sql)
+        time_range = {
+            'min_time': min_time,
+            'max_time': max_time
         }
+        self._time_range_cache = (time.monotonic() + METADATA_CACHE_TTL_SECONDS, time_range)
+        return dict(time_range)
 
     def close(self):
         """Close the database connection."""
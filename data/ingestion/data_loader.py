@@ -1,14 +1,53 @@
 """Data loader for parsing and loading JSON logs into DuckDB."""
 
-import json
+import ijson
+import orjson
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any, Tuple
 from utils.logger import setup_logger
 from data.database.duckdb_manager import DuckDBManager
 
 logger = setup_logger(__name__)
 
+# Hits parsed per batch when streaming a JSON export into the database
+JSON_BATCH_SIZE = 10000
+
+# Output columns, in service_logs / error_logs table order
+SERVICE_LOG_COLUMNS = [
+    'id', 'app_id', 'sid', 'service_name', 'record_time',
+    'total_count', 'success_count', 'error_count', 'na_error_count',
+    'success_rate', 'error_rate',
+    'response_time_avg', 'response_time_min', 'response_time_max',
+    'response_time_p25', 'response_time_p50', 'response_time_p75', 'response_time_p80',
+    'response_time_p85', 'response_time_p90', 'response_time_p95', 'response_time_p99',
+    'target_error_slo_perc', 'target_response_slo_sec', 'response_target_percent'
+]
+ERROR_LOG_COLUMNS = [
+    'id', 'wm_application_id', 'wm_application_name', 'wm_transaction_id',
+    'wm_transaction_name', 'error_codes', 'error_count', 'total_count',
+    'technical_error_count', 'business_error_count',
+    'response_time_avg', 'response_time_min', 'response_time_max',
+    'error_details', 'record_time'
+]
+
+# DOUBLE columns are declared float64 up front: a column that is all None in
+# a batch (e.g. percentiles missing from an export) would otherwise be object
+# dtype, which DuckDB has to inspect value by value. Integer columns are left
+# to inference, which already yields int64/float64.
+SERVICE_LOG_DTYPES = {
+    column: 'float64' for column in [
+        'success_rate', 'error_rate',
+        'response_time_avg', 'response_time_min', 'response_time_max',
+        'response_time_p25', 'response_time_p50', 'response_time_p75', 'response_time_p80',
+        'response_time_p85', 'response_time_p90', 'response_time_p95', 'response_time_p99',
+        'target_error_slo_perc', 'target_response_slo_sec', 'response_target_percent'
+    ]
+}
+ERROR_LOG_DTYPES = {
+    column: 'float64' for column in ['response_time_avg', 'response_time_min', 'response_time_max']
+}
+
 
 class DataLoader:
     """Loader for service and error logs."""
@@ -33,15 +72,30 @@ class DataLoader:
         logger.info(f"Loading service logs from {json_path}")
 
         try:
-            with open(json_path, 'r') as f:
-                data = json.load(f)
+            with open(json_path, 'rb') as f:
+                data = orjson.loads(f.read())
+        except Exception as e:
+            logger.error(f"Failed to load service logs: {e}")
+            raise
+
+        # Extract hits from Elasticsearch response
+        return self.parse_service_hits(data.get('hits', {}).get('hits', []))
+
+    def parse_service_hits(self, hits: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Parse service log hits from an OpenSearch response.
 
-            # Extract hits from Elasticsearch response
-            hits = data.get('hits', {}).get('hits', [])
+        Args:
+            hits: The response's ``hits.hits`` list
+
+        Returns:
+            DataFrame with parsed service logs
+        """
+        try:
             logger.info(f"Found {len(hits)} service log entries")
 
-            # Parse each entry
-            records = []
+            # Parse each entry into a row tuple (cheaper than a dict per row)
+            metric_values = self._metric_values
+            rows = []
             for idx, hit in enumerate(hits):
                 try:
                     source = hit.get('_source', {})
@@ -49,44 +103,44 @@ class DataLoader:
 
                     # Check if data is in scripted_metric (from OpenSearch) or fields (from JSON export)
                     scripted_metric = source.get('scripted_metric', {})
+                    metrics = metric_values(scripted_metric, fields)
 
                     # Extract percentiles from the nested structure
                     percentiles = source.get('percentiles_response_time_max', {})
 
-                    # Extract and flatten the data - prefer scripted_metric, fallback to fields
-                    record = {
-                        'id': hit.get('_id'),
-                        'app_id': source.get('app_id'),
-                        'sid': source.get('sid'),
-                        'service_name': scripted_metric.get('service_name') or self._extract_first(fields.get('service_name')),
-                        'record_time': source.get('record_time'),
-                        'total_count': scripted_metric.get('total_count') or self._extract_first(fields.get('total_count')),
-                        'success_count': scripted_metric.get('success_count') or self._extract_first(fields.get('success_count')),
-                        'error_count': scripted_metric.get('error_count') or self._extract_first(fields.get('error_count')),
-                        'na_error_count': scripted_metric.get('na_error_count') or self._extract_first(fields.get('na_error_count')),
-                        'success_rate': scripted_metric.get('success_rate') or self._extract_first(fields.get('success_rate')),
-                        'error_rate': scripted_metric.get('error_rate') or self._extract_first(fields.get('error_rate')),
-                        'response_time_avg': source.get('response_time_avg'),
-                        'response_time_min': source.get('response_time_min'),
-                        'response_time_max': source.get('response_time_max'),
-                        'response_time_p25': percentiles.get('25.0'),
-                        'response_time_p50': percentiles.get('50.0'),
-                        'response_time_p75': percentiles.get('75.0'),
-                        'response_time_p80': percentiles.get('80.0'),
-                        'response_time_p85': percentiles.get('85.0'),
-                        'response_time_p90': percentiles.get('90.0'),
-                        'response_time_p95': percentiles.get('95.0'),
-                        'response_time_p99': percentiles.get('99.0'),
-                        'target_error_slo_perc': scripted_metric.get('target_error_slo_perc') or self._extract_first(fields.get('target_error_slo_perc')),
-                        'target_response_slo_sec': scripted_metric.get('target_response_slo_sec') or self._extract_first(fields.get('target_response_slo_sec')),
-                        'response_target_percent': scripted_metric.get('response_target_percent') or self._extract_first(fields.get('response_target_percent'))
-                    }
-                    records.append(record)
+                    # Flatten in SERVICE_LOG_COLUMNS order - prefer scripted_metric, fallback to fields
+                    rows.append((
+                        hit.get('_id'),
+                        source.get('app_id'),
+                        source.get('sid'),
+                        metrics.get('service_name'),
+                        source.get('record_time'),
+                        metrics.get('total_count'),
+                        metrics.get('success_count'),
+                        metrics.get('error_count'),
+                        metrics.get('na_error_count'),
+                        metrics.get('success_rate'),
+                        metrics.get('error_rate'),
+                        source.get('response_time_avg'),
+                        source.get('response_time_min'),
+                        source.get('response_time_max'),
+                        percentiles.get('25.0'),
+                        percentiles.get('50.0'),
+                        percentiles.get('75.0'),
+                        percentiles.get('80.0'),
+                        percentiles.get('85.0'),
+                        percentiles.get('90.0'),
+                        percentiles.get('95.0'),
+                        percentiles.get('99.0'),
+                        metrics.get('target_error_slo_perc'),
+                        metrics.get('target_response_slo_sec'),
+                        metrics.get('response_target_percent')
+                    ))
                 except Exception as e:
                     logger.warning(f"Skipping service log entry {idx} due to error: {e}")
                     continue
 
-            df = pd.DataFrame(records)
+            df = pd.DataFrame.from_records(rows, columns=SERVICE_LOG_COLUMNS).astype(SERVICE_LOG_DTYPES)
             # Ensure continuous index for DuckDB compatibility
             df = df.reset_index(drop=True)
             logger.info(f"Parsed {len(df)} service log records")
@@ -108,15 +162,30 @@ class DataLoader:
         logger.info(f"Loading error logs from {json_path}")
 
         try:
-            with open(json_path, 'r') as f:
-                data = json.load(f)
+            with open(json_path, 'rb') as f:
+                data = orjson.loads(f.read())
+        except Exception as e:
+            logger.error(f"Failed to load error logs: {e}")
+            raise
+
+        # Extract hits from Elasticsearch response
+        return self.parse_error_hits(data.get('hits', {}).get('hits', []))
+
+    def parse_error_hits(self, hits: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Parse error log hits from an OpenSearch response.
+
+        Args:
+            hits: The response's ``hits.hits`` list
 
-            # Extract hits from Elasticsearch response
-            hits = data.get('hits', {}).get('hits', [])
+        Returns:
+            DataFrame with parsed error logs
+        """
+        try:
             logger.info(f"Found {len(hits)} error log entries")
 
-            # Parse each entry
-            records = []
+            # Parse each entry into a row tuple (cheaper than a dict per row)
+            metric_values = self._metric_values
+            rows = []
             for idx, hit in enumerate(hits):
                 try:
                     source = hit.get('_source', {})
@@ -124,31 +193,31 @@ class DataLoader:
 
                     # Check if data is in scripted_metric (from OpenSearch) or fields (from JSON export)
                     scripted_metric = source.get('scripted_metric', {})
-
-                    # Extract and flatten the data - prefer scripted_metric, fallback to fields
-                    record = {
-                        'id': hit.get('_id'),
-                        'wm_application_id': source.get('wmApplicationId'),
-                        'wm_application_name': source.get('wmApplicationName'),
-                        'wm_transaction_id': source.get('wmTransactionId'),
-                        'wm_transaction_name': scripted_metric.get('wmTransactionName') or self._extract_first(fields.get('wmTransactionName')),
-                        'error_codes': source.get('errorCodes'),
-                        'error_count': scripted_metric.get('error_count') or source.get('error_count'),
-                        'total_count': source.get('total_count'),
-                        'technical_error_count': scripted_metric.get('technical_error_count') or self._extract_first(fields.get('technical_error_count')),
-                        'business_error_count': scripted_metric.get('business_error_count') or self._extract_first(fields.get('business_error_count')),
-                        'response_time_avg': source.get('responseTime_avg'),
-                        'response_time_min': source.get('responseTime_min'),
-                        'response_time_max': source.get('responseTime_max'),
-                        'error_details': scripted_metric.get('error_details') or self._extract_first(fields.get('error_details')),
-                        'record_time': source.get('record_time')
-                    }
-                    records.append(record)
+                    metrics = metric_values(scripted_metric, fields)
+
+                    # Flatten in ERROR_LOG_COLUMNS order - prefer scripted_metric, fallback to fields
+                    rows.append((
+                        hit.get('_id'),
+                        source.get('wmApplicationId'),
+                        source.get('wmApplicationName'),
+                        source.get('wmTransactionId'),
+                        metrics.get('wmTransactionName'),
+                        source.get('errorCodes'),
+                        scripted_metric.get('error_count') or source.get('error_count'),
+                        source.get('total_count'),
+                        metrics.get('technical_error_count'),
+                        metrics.get('business_error_count'),
+                        source.get('responseTime_avg'),
+                        source.get('responseTime_min'),
+                        source.get('responseTime_max'),
+                        metrics.get('error_details'),
+                        source.get('record_time')
+                    ))
                 except Exception as e:
                     logger.warning(f"Skipping error log entry {idx} due to error: {e}")
                     continue
 
-            df = pd.DataFrame(records)
+            df = pd.DataFrame.from_records(rows, columns=ERROR_LOG_COLUMNS).astype(ERROR_LOG_DTYPES)
             # Ensure continuous index for DuckDB compatibility
             df = df.reset_index(drop=True)
             logger.info(f"Parsed {len(df)} error log records")
@@ -161,37 +230,136 @@ class DataLoader:
     def load_and_store_all(self, service_logs_path: str, error_logs_path: str):
         """Load and store both service and error logs.
 
+        The files are streamed in JSON_BATCH_SIZE batches, so the full
+        response is never held in memory.
+
         Args:
             service_logs_path: Path to service logs JSON
             error_logs_path: Path to error logs JSON
         """
-        # Load service logs
-        service_df = self.load_service_logs_from_json(service_logs_path)
-        self.db_manager.insert_service_logs(service_df)
+        logger.info(f"Loading service logs from {service_logs_path} and error logs from {error_logs_path}")
+        self.load_and_store_all_from_batches(
+            self.iter_json_hit_batches(service_logs_path),
+            self.iter_json_hit_batches(error_logs_path)
+        )
+
+    @staticmethod
+    def iter_json_hit_batches(json_path: str, batch_size: int = JSON_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Stream the ``hits.hits`` entries of a saved search response.
+
+        Args:
+            json_path: Path to the JSON file
+            batch_size: Hits per yielded batch
+
+        Yields:
+            Lists of at most batch_size hits
+        """
+        with open(json_path, 'rb') as f:
+            batch = []
+            for hit in ijson.items(f, 'hits.hits.item', use_float=True):
+                batch.append(hit)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+            if batch:
+                yield batch
+
+    def load_and_store_all_from_responses(self, service_logs: Dict[str, Any], error_logs: Dict[str, Any]):
+        """Load and store both service and error logs from OpenSearch responses.
 
-        # Load error logs
-        error_df = self.load_error_logs_from_json(error_logs_path)
-        self.db_manager.insert_error_logs(error_df)
+        Parses the responses in memory instead of round-tripping them through
+        JSON files.
+
+        Args:
+            service_logs: Service logs search response
+            error_logs: Error logs search response
+        """
+        service_df = self.parse_service_hits(service_logs.get('hits', {}).get('hits', []))
+        error_df = self.parse_error_hits(error_logs.get('hits', {}).get('hits', []))
+        self._store_all(service_df, error_df)
 
+    def load_and_store_all_from_batches(self,
+                                        service_batches: Iterable[List[Dict[str, Any]]],
+                                        error_batches: Iterable[List[Dict[str, Any]]]) -> Tuple[int, int]:
+        """Load and store service and error logs from streamed hit batches.
+
+        Each batch is parsed and appended as it arrives, so memory holds one
+        batch rather than the whole result set. The first batch of each index
+        that stores any rows replaces the existing rows; later batches are
+        appended. All batches commit as one transaction.
+
+        Args:
+            service_batches: Batches of service log hits
+            error_batches: Batches of error log hits
+
+        Returns:
+            Tuple of (service hits received, error hits received)
+        """
+        service_count = 0
+        error_count = 0
+
+        with self.db_manager.transaction():
+            # Empty or all-invalid batches store nothing, so replacing waits
+            # for the first batch that actually inserts rows
+            replaced = False
+            for hits in service_batches:
+                inserted = self.db_manager.insert_service_logs(self.parse_service_hits(hits), replace=not replaced)
+                replaced = replaced or inserted > 0
+                service_count += len(hits)
+
+            replaced = False
+            for hits in error_batches:
+                inserted = self.db_manager.insert_error_logs(self.parse_error_hits(hits), replace=not replaced)
+                replaced = replaced or inserted > 0
+                error_count += len(hits)
+
+        self._log_summary()
+        return service_count, error_count
+
+    def _store_all(self, service_df: pd.DataFrame, error_df: pd.DataFrame):
+        """Store parsed service and error logs in one transaction.
+
+        Args:
+            service_df: Parsed service logs
+            error_df: Parsed error logs
+        """
+        with self.db_manager.transaction():
+            self.db_manager.insert_service_logs(service_df)
+            self.db_manager.insert_error_logs(error_df)
+        self._log_summary()
+
+    def _log_summary(self):
+        """Log what is in the database after a load."""
         logger.info("All logs loaded successfully")
 
         # Print summary
         time_range = self.db_manager.get_time_range()
-        all_services = self.db_manager.get_all_services()
+        service_count = self.db_manager.count_services()
 
         logger.info(f"Data time range: {time_range['min_time']} to {time_range['max_time']}")
-        logger.info(f"Total unique services: {len(all_services)}")
+        logger.info(f"Total unique services: {service_count}")
 
     @staticmethod
-    def _extract_first(value):
-        """Extract first element from list or return value as-is.
+    def _metric_values(scripted_metric: Dict[str, Any], fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge a hit's metrics, preferring scripted_metric over fields.
+
+        Falsy scripted_metric values fall back to fields. Fields values come
+        as single-element lists in JSON exports; their first element is used.
+        Merging once per hit is cheaper than a lookup call per column.
 
         Args:
-            value: Value to extract from
+            scripted_metric: The hit's ``_source.scripted_metric`` dict
+            fields: The hit's ``fields`` dict
 
         Returns:
-            First element if list, otherwise value itself
+            Dictionary of metric name to value
         """
-        if isinstance(value, list) and len(value) > 0:
-            return value[0]
-        return value
+        metrics = {
+            name: value[0] if isinstance(value, list) and len(value) > 0 else value
+            for name, value in fields.items()
+        }
+        for name, value in scripted_metric.items():
+            if value:
+                metrics[name] = value
+        return metrics
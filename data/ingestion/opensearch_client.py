@@ -1,19 +1,31 @@
 """OpenSearch client for real-time log ingestion."""
 
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
-from opensearchpy import OpenSearch
+from typing import Dict, Iterator, List, Any, Optional
+from cachetools import TTLCache
+from opensearchpy import OpenSearch, helpers
 from utils.logger import setup_logger
 from utils.config import (
     OPENSEARCH_HOST, OPENSEARCH_PORT, OPENSEARCH_USERNAME,
     OPENSEARCH_PASSWORD, OPENSEARCH_USE_SSL,
-    OPENSEARCH_INDEX_SERVICE, OPENSEARCH_INDEX_ERROR
+    OPENSEARCH_INDEX_SERVICE, OPENSEARCH_INDEX_ERROR,
+    OPENSEARCH_POOL_MAXSIZE, OPENSEARCH_TIMEOUT, OPENSEARCH_MAX_RETRIES,
+    MAX_RESULT_WINDOW
 )
 import pandas as pd
 
 logger = setup_logger(__name__)
 
+# Fetches beyond MAX_RESULT_WINDOW page through the scroll API in batches
+SCROLL_BATCH_SIZE = 1000
+
+# Repeated get_latest_logs calls within this many seconds reuse one fetch
+# instead of re-querying OpenSearch
+LATEST_LOGS_CACHE_TTL_SECONDS = 60
+LATEST_LOGS_CACHE_MAX_SIZE = 8
+
 
 class OpenSearchClient:
     """Client for querying OpenSearch indices."""
@@ -23,10 +35,17 @@ class OpenSearchClient:
         self.os_client = OpenSearch(
             hosts=[{'host': OPENSEARCH_HOST, 'port': OPENSEARCH_PORT}],
             http_auth=(OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD),
-            use_ssl=OPENSEARCH_USE_SSL
+            use_ssl=OPENSEARCH_USE_SSL,
+            pool_maxsize=OPENSEARCH_POOL_MAXSIZE,
+            timeout=OPENSEARCH_TIMEOUT,
+            max_retries=OPENSEARCH_MAX_RETRIES,
+            retry_on_timeout=True
         )
         self.os_index_service = OPENSEARCH_INDEX_SERVICE
         self.os_index_error = OPENSEARCH_INDEX_ERROR
+        # hours -> (service_logs, error_logs); bounded, so old fetches are evicted
+        self._latest_logs_cache = TTLCache(maxsize=LATEST_LOGS_CACHE_MAX_SIZE, ttl=LATEST_LOGS_CACHE_TTL_SECONDS)
+        self._latest_logs_lock = threading.Lock()
 
         logger.info(f"OpenSearch client initialized (host: {OPENSEARCH_HOST})")
 
@@ -40,23 +59,65 @@ class OpenSearchClient:
         Args:
             start_time: Start time for query
             end_time: End time for query
-            size: Maximum number of results per batch (max 10,000)
+            size: Maximum number of results (max 10,000 unless use_scroll)
             use_scroll: Use scroll API for large datasets (>10k results)
 
         Returns:
             OpenSearch query results
+
+        Raises:
+            ValueError: If size exceeds MAX_RESULT_WINDOW without use_scroll
+        """
+        self._check_size(size, use_scroll)
+        query = self._build_service_query(start_time, end_time, SCROLL_BATCH_SIZE if use_scroll else size)
+
+        try:
+            if use_scroll:
+                # Use scroll API for large datasets
+                return self._query_with_scroll(self.os_index_service, query, max_hits=size)
+            else:
+                # Standard query (limited to 10k)
+                response = self.os_client.search(
+                    index=self.os_index_service,
+                    body=query
+                )
+                logger.info(f"Retrieved {len(response['hits']['hits'])} service log entries")
+                return response
+        except Exception as e:
+            logger.error(f"Failed to query service logs: {e}")
+            raise
+
+    @staticmethod
+    def _check_size(size: int, use_scroll: bool):
+        """Reject plain searches that OpenSearch would cap at MAX_RESULT_WINDOW.
+
+        Args:
+            size: Requested number of results
+            use_scroll: Whether the scroll API will be used
+
+        Raises:
+            ValueError: If size exceeds MAX_RESULT_WINDOW without use_scroll
         """
-        # Validate size limit
-        if size > 10000:
-            logger.warning(f"Size {size} exceeds OpenSearch limit. Setting to 10,000")
-            size = 10000
+        if size > MAX_RESULT_WINDOW and not use_scroll:
+            raise ValueError(f"size {size:,} exceeds the {MAX_RESULT_WINDOW:,} result window; use scroll for more")
+
+    def _build_service_query(self,
+                             start_time: Optional[datetime],
+                             end_time: Optional[datetime],
+                             size: int) -> Dict[str, Any]:
+        """Build the service logs search body.
+
+        Args:
+            start_time: Start time for query
+            end_time: End time for query
+            size: Maximum number of results (max 10,000)
 
-        # Build time range filter
+        Returns:
+            OpenSearch query body
+        """
         query = {
             "size": size,
-            "query": {
-                "match_all": {}
-            },
+            "query": self._build_time_filter(start_time, end_time),
             "sort": [
                 {"record_time": {"order": "desc"}}
             ],
@@ -73,125 +134,311 @@ class OpenSearchClient:
                 "target_response_slo_sec",
                 "response_target_percent"
             ],
-            "_source": True  # Also include _source
+            # Only the _source keys the DataLoader reads; the metrics above
+            # are not stored in _source, so both parts are needed
+            "_source": [
+                "app_id",
+                "sid",
+                "record_time",
+                "response_time_avg",
+                "response_time_min",
+                "response_time_max",
+                "percentiles_response_time_max",
+                "scripted_metric"
+            ]
         }
 
-        if start_time or end_time:
-            time_range = {}
-            if start_time:
-                time_range["gte"] = int(start_time.timestamp() * 1000)
-            if end_time:
-                time_range["lte"] = int(end_time.timestamp() * 1000)
-
-            query["query"] = {
-                "range": {
-                    "record_time": time_range
-                }
+        return query
+
+    @staticmethod
+    def _build_time_filter(start_time: Optional[datetime],
+                           end_time: Optional[datetime]) -> Dict[str, Any]:
+        """Build the record_time range clause shared by both log queries.
+
+        Args:
+            start_time: Start time for query
+            end_time: End time for query
+
+        Returns:
+            OpenSearch query clause (match_all when no bounds are given)
+        """
+        if not (start_time or end_time):
+            return {"match_all": {}}
+
+        time_range = {}
+        if start_time:
+            time_range["gte"] = int(start_time.timestamp() * 1000)
+        if end_time:
+            time_range["lte"] = int(end_time.timestamp() * 1000)
+
+        return {
+            "range": {
+                "record_time": time_range
             }
+        }
+
+    def query_error_logs(self,
+                        start_time: Optional[datetime] = None,
+                        end_time: Optional[datetime] = None,
+                        size: int = 1000,
+                        use_scroll: bool = False) -> Dict[str, Any]:
+        """Query error logs from OpenSearch.
+
+        Args:
+            start_time: Start time for query
+            end_time: End time for query
+            size: Maximum number of results (max 10,000 unless use_scroll)
+            use_scroll: Use scroll API for large datasets (>10k results)
+
+        Returns:
+            OpenSearch query results
+
+        Raises:
+            ValueError: If size exceeds MAX_RESULT_WINDOW without use_scroll
+        """
+        self._check_size(size, use_scroll)
+        query = self._build_error_query(start_time, end_time, SCROLL_BATCH_SIZE if use_scroll else size)
 
         try:
             if use_scroll:
                 # Use scroll API for large datasets
-                return self._query_with_scroll(self.os_index_service, query)
+                return self._query_with_scroll(self.os_index_error, query, max_hits=size)
             else:
                 # Standard query (limited to 10k)
                 response = self.os_client.search(
-                    index=self.os_index_service,
+                    index=self.os_index_error,
                     body=query
                 )
-                logger.info(f"Retrieved {len(response['hits']['hits'])} service log entries")
+                logger.info(f"Retrieved {len(response['hits']['hits'])} error log entries")
                 return response
         except Exception as e:
-            logger.error(f"Failed to query service logs: {e}")
+            logger.error(f"Failed to query error logs: {e}")
             raise
 
-    def query_error_logs(self,
-                        start_time: Optional[datetime] = None,
-                        end_time: Optional[datetime] = None,
-                        size: int = 1000,
-                        use_scroll: bool = False) -> Dict[str, Any]:
-        """Query error logs from OpenSearch.
+    def _build_error_query(self,
+                           start_time: Optional[datetime],
+                           end_time: Optional[datetime],
+                           size: int) -> Dict[str, Any]:
+        """Build the error logs search body.
 
         Args:
             start_time: Start time for query
             end_time: End time for query
-            size: Maximum number of results per batch (max 10,000)
-            use_scroll: Use scroll API for large datasets (>10k results)
+            size: Maximum number of results (max 10,000)
 
         Returns:
-            OpenSearch query results
+            OpenSearch query body
         """
-        # Validate size limit
-        if size > 10000:
-            logger.warning(f"Size {size} exceeds OpenSearch limit. Setting to 10,000")
-            size = 10000
-
-        # Build time range filter
         query = {
             "size": size,
-            "query": {
-                "match_all": {}
-            },
+            "query": self._build_time_filter(start_time, end_time),
             "sort": [
                 {"record_time": {"order": "desc"}}
             ],
             # Request all fields explicitly for error logs
             "fields": [
-                "summary",
                 "error_details",
                 "technical_error_count",
                 "business_error_count"
             ],
-            "_source": True  # Also include _source
+            # Only the _source keys the DataLoader reads
+            "_source": [
+                "wmApplicationId",
+                "wmApplicationName",
+                "wmTransactionId",
+                "errorCodes",
+                "error_count",
+                "total_count",
+                "responseTime_avg",
+                "responseTime_min",
+                "responseTime_max",
+                "record_time",
+                "scripted_metric"
+            ]
         }
 
-        if start_time or end_time:
-            time_range = {}
-            if start_time:
-                time_range["gte"] = int(start_time.timestamp() * 1000)
-            if end_time:
-                time_range["lte"] = int(end_time.timestamp() * 1000)
-
-            query["query"] = {
-                "range": {
-                    "record_time": time_range
-                }
-            }
+        return query
+
+    def query_all_logs(self,
+                       start_time: Optional[datetime] = None,
+                       end_time: Optional[datetime] = None,
+                       size: int = 1000,
+                       use_scroll: bool = False) -> tuple[Dict[str, Any], Dict[str, Any]]:
+        """Query service and error logs together.
+
+        Without scrolling, both searches go out as one _msearch request, which
+        OpenSearch executes in parallel. Scrolled searches need their own
+        scroll contexts, so they run on separate threads instead; either way
+        the total wait is the slower search rather than the sum of both.
+
+        Args:
+            start_time: Start time for query
+            end_time: End time for query
+            size: Maximum number of results per index (max 10,000 unless use_scroll)
+            use_scroll: Use scroll API for large datasets (>10k results)
+
+        Returns:
+            Tuple of (service_logs, error_logs)
+
+        Raises:
+            ValueError: If size exceeds MAX_RESULT_WINDOW without use_scroll
+        """
+        self._check_size(size, use_scroll)
+        if not use_scroll:
+            service_logs, error_logs = self.msearch([
+                (self.os_index_service, self._build_service_query(start_time, end_time, size)),
+                (self.os_index_error, self._build_error_query(start_time, end_time, size))
+            ])
+            logger.info(f"Retrieved {len(service_logs['hits']['hits'])} service log entries "
+                        f"and {len(error_logs['hits']['hits'])} error log entries")
+            return service_logs, error_logs
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            service_future = pool.submit(self.query_service_logs, start_time, end_time, size, use_scroll)
+            error_future = pool.submit(self.query_error_logs, start_time, end_time, size, use_scroll)
+            return service_future.result(), error_future.result()
+
+    def iter_service_log_batches(self,
+                                 start_time: Optional[datetime] = None,
+                                 end_time: Optional[datetime] = None,
+                                 max_hits: Optional[int] = None,
+                                 batch_size: int = SCROLL_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Stream service log hits in batches, newest first.
+
+        Args:
+            start_time: Start time for query
+            end_time: End time for query
+            max_hits: Stop after this many hits (default: all matches)
+            batch_size: Hits per yielded batch
+
+        Yields:
+            Lists of at most batch_size hits
+        """
+        query = self._build_service_query(start_time, end_time, batch_size)
+        yield from self._scan_batches(self.os_index_service, query, max_hits, batch_size)
+
+    def iter_error_log_batches(self,
+                               start_time: Optional[datetime] = None,
+                               end_time: Optional[datetime] = None,
+                               max_hits: Optional[int] = None,
+                               batch_size: int = SCROLL_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Stream error log hits in batches, newest first.
+
+        Args:
+            start_time: Start time for query
+            end_time: End time for query
+            max_hits: Stop after this many hits (default: all matches)
+            batch_size: Hits per yielded batch
+
+        Yields:
+            Lists of at most batch_size hits
+        """
+        query = self._build_error_query(start_time, end_time, batch_size)
+        yield from self._scan_batches(self.os_index_error, query, max_hits, batch_size)
+
+    def _scan_batches(self,
+                      index: str,
+                      query: Dict[str, Any],
+                      max_hits: Optional[int],
+                      batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Scroll through an index with helpers.scan, yielding fixed-size batches.
+
+        helpers.scan drives the scroll context and clears it when done. Only
+        one batch is held in memory at a time; _query_with_scroll collects
+        the batches for callers that need a single response.
+
+        Args:
+            index: Index name
+            query: Query body (its sort order is preserved)
+            max_hits: Stop after this many hits (default: all matches)
+            batch_size: Hits per yielded batch
+
+        Yields:
+            Lists of at most batch_size hits
+        """
+        query = {key: value for key, value in query.items() if key != 'size'}
+        hits = helpers.scan(
+            self.os_client,
+            query=query,
+            index=index,
+            size=batch_size,
+            scroll='2m',
+            preserve_order=True
+        )
+
+        batch = []
+        count = 0
+        for hit in hits:
+            if max_hits is not None and count >= max_hits:
+                break
+            batch.append(hit)
+            count += 1
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+        logger.info(f"Streamed {count} hits from index {index}")
+
+    def msearch(self, searches: List[tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Run several searches in a single _msearch round trip.
+
+        Args:
+            searches: List of (index, query body) pairs
+
+        Returns:
+            One search response per entry, in the same order
+
+        Raises:
+            RuntimeError: If any of the searches failed
+        """
+        body = []
+        for index, query in searches:
+            body.append({'index': index})
+            body.append(query)
 
         try:
-            if use_scroll:
-                # Use scroll API for large datasets
-                return self._query_with_scroll(self.os_index_error, query)
-            else:
-                # Standard query (limited to 10k)
-                response = self.os_client.search(
-                    index=self.os_index_error,
-                    body=query
-                )
-                logger.info(f"Retrieved {len(response['hits']['hits'])} error log entries")
-                return response
+            responses = self.os_client.msearch(body=body)['responses']
         except Exception as e:
-            logger.error(f"Failed to query error logs: {e}")
+            logger.error(f"Multi-search failed: {e}")
             raise
 
+        for (index, _), response in zip(searches, responses):
+            if 'error' in response:
+                logger.error(f"Search on {index} failed: {response['error']}")
+                raise RuntimeError(f"Search on {index} failed: {response['error']}")
+
+        return responses
+
     def get_latest_logs(self, hours: int = 4) -> tuple[Dict[str, Any], Dict[str, Any]]:
         """Get latest logs from the past N hours.
 
+        The window runs up to now. Calls within LATEST_LOGS_CACHE_TTL_SECONDS
+        of a fetch for the same number of hours reuse its result.
+
         Args:
             hours: Number of hours to look back
 
         Returns:
             Tuple of (service_logs, error_logs)
         """
+        with self._latest_logs_lock:
+            cached = self._latest_logs_cache.get(hours)
+        if cached is not None:
+            logger.info(f"Reusing latest logs fetched within the last {LATEST_LOGS_CACHE_TTL_SECONDS}s")
+            return cached
+
         end_time = datetime.now()
         start_time = end_time - timedelta(hours=hours)
 
         logger.info(f"Fetching logs from {start_time} to {end_time}")
 
-        service_logs = self.query_service_logs(start_time, end_time)
-        error_logs = self.query_error_logs(start_time, end_time)
-
-        return service_logs, error_logs
+        logs = self.query_all_logs(start_time, end_time)
+        with self._latest_logs_lock:
+            self._latest_logs_cache[hours] = logs
+        return logs
 
     def stream_latest_logs(self, from_data_loader: Any):
         """Stream latest logs and load into database.
@@ -206,93 +453,46 @@ class OpenSearchClient:
             # Get latest logs (past 4 hours)
             service_logs, error_logs = self.get_latest_logs(hours=4)
 
-            # Save to temporary JSON files
-            import tempfile
-            import os
-
-            with tempfile.NamedTemporaryFile(mode='w', suffix='_service.json', delete=False) as f:
-                json.dump(service_logs, f)
-                service_temp_path = f.name
+            # Load into database straight from the responses
+            from_data_loader.load_and_store_all_from_responses(service_logs, error_logs)
 
-            with tempfile.NamedTemporaryFile(mode='w', suffix='_error.json', delete=False) as f:
-                json.dump(error_logs, f)
-                error_temp_path = f.name
+            logger.info("Successfully streamed and loaded latest logs")
 
-            try:
-                # Load into database
-                from_data_loader.load_and_store_all(service_temp_path, error_temp_path)
-
-                logger.info("Successfully streamed and loaded latest logs")
-
-                return {
-                    'service_logs_count': len(service_logs.get('hits', {}).get('hits', [])),
-                    'error_logs_count': len(error_logs.get('hits', {}).get('hits', [])),
-                    'status': 'success'
-                }
-            finally:
-                # Clean up temp files
-                os.unlink(service_temp_path)
-                os.unlink(error_temp_path)
+            return {
+                'service_logs_count': len(service_logs.get('hits', {}).get('hits', [])),
+                'error_logs_count': len(error_logs.get('hits', {}).get('hits', [])),
+                'status': 'success'
+            }
 
         except Exception as e:
             logger.error(f"Failed to stream logs: {e}")
             raise
 
-    def _query_with_scroll(self, index: str, query: Dict[str, Any], batch_size: int = 1000) -> Dict[str, Any]:
+    def _query_with_scroll(self,
+                           index: str,
+                           query: Dict[str, Any],
+                           batch_size: int = SCROLL_BATCH_SIZE,
+                           max_hits: Optional[int] = None) -> Dict[str, Any]:
         """Query OpenSearch using scroll API for large datasets.
 
+        Collects every batch from _scan_batches into one response; prefer the
+        iter_*_log_batches generators when the hits can be consumed
+        incrementally.
+
         Args:
             index: Index name
             query: Query body
             batch_size: Number of results per batch
+            max_hits: Stop after this many results (default: all matches)
 
         Returns:
             Combined results from all scroll batches
         """
-        logger.info(f"Using scroll API for index {index}")
-
-        # Initial search with scroll
-        query['size'] = batch_size
-        response = self.os_client.search(
-            index=index,
-            body=query,
-            scroll='2m'  # Keep scroll context for 2 minutes
-        )
-
-        scroll_id = response['_scroll_id']
-        all_hits = response['hits']['hits']
-        total_hits = response['hits']['total']['value']
-
-        logger.info(f"Total hits to retrieve: {total_hits}")
-
-        # Continue scrolling until no more results
-        while len(all_hits) < total_hits:
-            try:
-                response = self.os_client.scroll(
-                    scroll_id=scroll_id,
-                    scroll='2m'
-                )
-
-                # Break if no more hits
-                if not response['hits']['hits']:
-                    break
-
-                all_hits.extend(response['hits']['hits'])
-                scroll_id = response['_scroll_id']
-
-                logger.info(f"Retrieved {len(all_hits)}/{total_hits} hits")
-
-            except Exception as e:
-                logger.error(f"Scroll failed: {e}")
-                break
-
-        # Clear scroll context
-        try:
-            self.os_client.clear_scroll(scroll_id=scroll_id)
-        except:
-            pass
-
-        logger.info(f"Scroll complete: Retrieved {len(all_hits)} total hits")
+        all_hits = [
+            hit
+            for batch in self._scan_batches(index, query, max_hits, batch_size)
+            for hit in batch
+        ]
 
         # Return in same format as regular search
         return {
@@ -1,8 +1,8 @@
 """Debug script for OpenSearch data fetching issues."""
 
 import sys
-import json
 from datetime import datetime, timedelta
+from functools import lru_cache
 from data.ingestion.opensearch_client import OpenSearchClient
 from data.ingestion.data_loader import DataLoader
 from data.database.duckdb_manager import DuckDBManager
@@ -11,6 +11,18 @@ from utils.logger import setup_logger
 logger = setup_logger(__name__)
 
 
+@lru_cache(maxsize=1)
+def get_opensearch_client() -> OpenSearchClient:
+    """Get the OpenSearch client shared by all tests (one connection pool)."""
+    return OpenSearchClient()
+
+
+@lru_cache(maxsize=1)
+def get_db_manager() -> DuckDBManager:
+    """Get the DuckDB manager shared by all tests."""
+    return DuckDBManager()
+
+
 def test_opensearch_connection():
     """Test basic OpenSearch connection."""
     print("\n" + "="*60)
@@ -18,7 +30,7 @@ def test_opensearch_connection():
     print("="*60)
 
     try:
-        client = OpenSearchClient()
+        client = get_opensearch_client()
         if client.test_connection():
             print("✅ OpenSearch connection successful")
             return True
@@ -37,7 +49,7 @@ def test_small_query():
     print("="*60)
 
     try:
-        client = OpenSearchClient()
+        client = get_opensearch_client()
         end_time = datetime.now()
         start_time = end_time - timedelta(hours=4)
 
@@ -83,40 +95,23 @@ def test_data_parsing(service_logs, error_logs):
         return False
 
     try:
-        import tempfile
-        import os
-
-        # Save to temp files
-        with tempfile.NamedTemporaryFile(mode='w', suffix='_service.json', delete=False) as f:
-            json.dump(service_logs, f)
-            service_temp_path = f.name
-
-        with tempfile.NamedTemporaryFile(mode='w', suffix='_error.json', delete=False) as f:
-            json.dump(error_logs, f)
-            error_temp_path = f.name
-
-        try:
-            # Test parsing
-            db_manager = DuckDBManager()
-            data_loader = DataLoader(db_manager)
-
-            print("Parsing service logs...")
-            service_df = data_loader.load_service_logs_from_json(service_temp_path)
-            print(f"✅ Parsed {len(service_df)} service log records")
-            print(f"   Columns: {list(service_df.columns)}")
-            print(f"   Sample IDs: {service_df['id'].head(3).tolist()}")
-
-            print("\nParsing error logs...")
-            error_df = data_loader.load_error_logs_from_json(error_temp_path)
-            print(f"✅ Parsed {len(error_df)} error log records")
-            print(f"   Columns: {list(error_df.columns)}")
-            print(f"   Sample IDs: {error_df['id'].head(3).tolist()}")
-
-            return True
+        # Parse the in-memory responses directly (no temp-file JSON round trip)
+        db_manager = get_db_manager()
+        data_loader = DataLoader(db_manager)
+
+        print("Parsing service logs...")
+        service_df = data_loader.parse_service_hits(service_logs['hits']['hits'])
+        print(f"✅ Parsed {len(service_df)} service log records")
+        print(f"   Columns: {list(service_df.columns)}")
+        print(f"   Sample IDs: {service_df['id'].head(3).tolist()}")
+
+        print("\nParsing error logs...")
+        error_df = data_loader.parse_error_hits(error_logs['hits']['hits'])
+        print(f"✅ Parsed {len(error_df)} error log records")
+        print(f"   Columns: {list(error_df.columns)}")
+        print(f"   Sample IDs: {error_df['id'].head(3).tolist()}")
 
-        finally:
-            os.unlink(service_temp_path)
-            os.unlink(error_temp_path)
+        return True
 
     except Exception as e:
         print(f"❌ Parsing failed: {e}")
@@ -133,29 +128,27 @@ def test_large_query():
     print("⚠️  This may take a while...")
 
     try:
-        client = OpenSearchClient()
+        client = get_opensearch_client()
         end_time = datetime.now()
         start_time = end_time - timedelta(days=30)
 
         print(f"Fetching from {start_time} to {end_time}")
-        print("Using scroll API for unlimited results...")
+        print("Streaming scroll batches (one batch in memory at a time)...")
 
-        service_logs = client.query_service_logs(
-            start_time=start_time,
-            end_time=end_time,
-            size=1000,
-            use_scroll=True
-        )
+        service_count = 0
+        first_id = last_id = None
+        for batch in client.iter_service_log_batches(start_time=start_time, end_time=end_time):
+            if first_id is None:
+                first_id = batch[0].get('_id')
+            last_id = batch[-1].get('_id')
+            service_count += len(batch)
 
-        service_count = len(service_logs.get('hits', {}).get('hits', []))
         print(f"✅ Fetched {service_count:,} service logs")
 
-        if service_count > 10000:
+        if service_count:
             print("   Testing data structure...")
-            hits = service_logs.get('hits', {}).get('hits', [])
-            print(f"   First record ID: {hits[0].get('_id')}")
-            print(f"   Last record ID: {hits[-1].get('_id')}")
-            print(f"   Record at index 10000: {hits[10000].get('_id')}")
+            print(f"   First record ID: {first_id}")
+            print(f"   Last record ID: {last_id}")
 
         return True
 
@@ -1,6 +1,7 @@
 """Test script to verify SLO chatbot system."""
 
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Import components
@@ -16,6 +17,12 @@ from utils.config import PROJECT_ROOT
 logger = setup_logger(__name__)
 
 
+@lru_cache(maxsize=1)
+def get_db_manager() -> DuckDBManager:
+    """Get the DuckDB manager shared by all tests (one connection)."""
+    return DuckDBManager()
+
+
 def test_data_loading():
     """Test data loading from JSON files."""
     print("\n" + "="*60)
@@ -24,7 +31,7 @@ def test_data_loading():
 
     try:
         # Initialize database
-        db_manager = DuckDBManager()
+        db_manager = get_db_manager()
         data_loader = DataLoader(db_manager)
 
         # Load data
@@ -68,7 +75,7 @@ def test_slo_calculator():
     print("="*60)
 
     try:
-        db_manager = DuckDBManager()
+        db_manager = get_db_manager()
         slo_calculator = SLOCalculator(db_manager)
 
         # Get current SLI
@@ -105,7 +112,7 @@ def test_degradation_detector():
     print("="*60)
 
     try:
-        db_manager = DuckDBManager()
+        db_manager = get_db_manager()
         degradation_detector = DegradationDetector(db_manager)
 
         # Detect degrading services
@@ -137,7 +144,7 @@ def test_trend_analyzer():
     print("="*60)
 
     try:
-        db_manager = DuckDBManager()
+        db_manager = get_db_manager()
         trend_analyzer = TrendAnalyzer(db_manager)
 
         # Predict issues
@@ -169,7 +176,7 @@ def test_metrics_aggregator():
     print("="*60)
 
     try:
-        db_manager = DuckDBManager()
+        db_manager = get_db_manager()
         metrics_aggregator = MetricsAggregator(db_manager)
 
         # Get health overview
@@ -15,12 +15,23 @@ DATABASE_DIR.mkdir(parents=True, exist_ok=True)
 
 # Database configuration
 DUCKDB_PATH = DATABASE_DIR / "slo_analytics.duckdb"
+# Worker threads per query; unset uses DuckDB's default (all cores)
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS")) if os.getenv("DUCKDB_THREADS") else None
+# Memory cap such as "4GB"; unset uses DuckDB's default (80% of RAM)
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT")
+# Where large sorts/aggregations spill; unset uses DuckDB's default (<db file>.tmp)
+DUCKDB_TEMP_DIRECTORY = os.getenv("DUCKDB_TEMP_DIRECTORY")
 
 # AWS Bedrock configuration
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION", "ap-south-1")
 BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "global.anthropic.claude-sonnet-4-5-20250929-v1:0")
+BEDROCK_SUMMARY_MODEL_ID = os.getenv("BEDROCK_SUMMARY_MODEL_ID", "global.anthropic.claude-haiku-4-5-20251001-v1:0")
+
+# Conversation history limits (older turns are summarized once exceeded)
+CHAT_HISTORY_MAX_TURNS = 20
+CHAT_HISTORY_TOKEN_BUDGET = 12000
 
 # OpenSearch configuration
 OPENSEARCH_HOST = os.getenv("OPENSEARCH_HOST", "localhost")
@@ -30,6 +41,13 @@ OPENSEARCH_PASSWORD = os.getenv("OPENSEARCH_PASSWORD", "")
 OPENSEARCH_USE_SSL = os.getenv("OPENSEARCH_USE_SSL", "False").lower() == "true"
 OPENSEARCH_INDEX_SERVICE = os.getenv("OPENSEARCH_INDEX_SERVICE", "hourly_wm_wmplatform_31854")
 OPENSEARCH_INDEX_ERROR = os.getenv("OPENSEARCH_INDEX_ERROR", "hourly_wm_wmplatform_31854_error")
+# Keep-alive connections kept per host, so concurrent searches reuse TLS sessions
+OPENSEARCH_POOL_MAXSIZE = int(os.getenv("OPENSEARCH_POOL_MAXSIZE", "32"))
+# Per-request timeout in seconds; timed-out requests are retried
+OPENSEARCH_TIMEOUT = int(os.getenv("OPENSEARCH_TIMEOUT", "30"))
+OPENSEARCH_MAX_RETRIES = int(os.getenv("OPENSEARCH_MAX_RETRIES", "3"))
+# Largest page a plain search may return (OpenSearch index.max_result_window)
+MAX_RESULT_WINDOW = 10000
 
 # SLO Thresholds (configurable)
 DEFAULT_ERROR_SLO_THRESHOLD = 1.0  # 1% error rate
@@ -39,6 +57,8 @@ DEFAULT_SLO_TARGET_PERCENT = 98    # 98% of requests must meet SLO
 # Analytics configuration
 DEGRADATION_WINDOW_MINUTES = 30
 DEGRADATION_THRESHOLD_PERCENT = 20  # 20% increase is considered degradation
+VOLUME_TREND_MAX_POINTS = 100  # Max time series points returned by get_volume_trends
+DASHBOARD_CACHE_TTL_SECONDS = 60  # How long dashboard aggregates are reused
 
 # Logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -4,6 +4,14 @@ import logging
 import sys
 from utils.config import LOG_LEVEL
 
+# One handler shared by every module logger
+_HANDLER = logging.StreamHandler(sys.stdout)
+_HANDLER.setLevel(LOG_LEVEL)
+_HANDLER.setFormatter(logging.Formatter(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+))
+
 def setup_logger(name: str) -> logging.Logger:
     """Set up a logger with consistent formatting.
 
@@ -16,16 +24,9 @@ def setup_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.setLevel(LOG_LEVEL)
 
-    # Avoid duplicate handlers
+    # Avoid duplicate handlers (also across module reloads, which create a
+    # new _HANDLER object)
     if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(LOG_LEVEL)
-
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        logger.addHandler(_HANDLER)
 
     return logger